@@ -0,0 +1,289 @@
+## @package benchmark
+#  Benchmark suite of the clustering algorithms and heuristics
+#  Every clustering algorithm and heuristic is run on the data clouds in resources/data and on generated data clouds,
+#  wall time, peak memory, objective function score and evaluations per second are written to a JSON results file.
+#  Two results files can be compared to find regressions.
+#
+#  Command line usage:
+#  python benchmark.py run -o results.json --sizes 1000 10000 100000
+#  python benchmark.py compare base.json results.json --threshold 0.1
+
+import argparse
+import glob
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from dataclasses import replace
+import numpy as np
+import sklearn
+from sklearn.datasets import make_blobs
+from cache import clear_caches
+from clustering import CLUSTERINGS, Clustering
+from distances import default_distances, MAX_MATRIX_NODES
+from heuristics import HEURISTICS
+
+## Largest data cloud each clustering algorithm is run on, the others need O(n^2) memory
+MAX_NODES = {
+    "kmeans": None,
+    "affinity": 2000,
+    "meanshift": 10000,
+    "spectral": 5000,
+    "hierarchical": 10000,
+    "dbscan": None,
+    "minibatch_kmeans": None,
+    "birch": None,
+    "sampled": None,
+}
+
+## Metrics compared between two results files, True if a larger value is better
+METRICS = {
+    "wall_time": False,
+    "peak_memory": False,
+    "objective": False,
+    "evaluations_per_second": True,
+}
+
+
+## Generate a data cloud of Gaussian blobs in the coordinate range of resources/data
+# @param n_nodes Number of nodes
+# @param n_centers Number of blobs
+# @param seed Seed of the generator
+def make_instance(n_nodes, n_centers=8, seed=0):
+    data, _ = make_blobs(n_samples=n_nodes, centers=n_centers, cluster_std=3000.0, center_box=(0.0, 50000.0), random_state=seed)
+    return data
+
+
+## Data clouds of the benchmark
+# @param sizes Number of nodes of the generated data clouds
+# @return List of (name, data cloud)
+def load_instances(sizes):
+    instances = list()
+    for path in sorted(glob.glob(os.path.join("resources", "data", "*.txt")), key=lambda path: (len(path), path)):
+        instances.append((os.path.basename(path), np.loadtxt(path)))
+    for size in sizes:
+        instances.append((f"blobs_{size}", make_instance(size)))
+    return instances
+
+
+## Parameters of a clustering algorithm for a data cloud
+#  Default parameters, with 5 clusters (or fewer for tiny data clouds) and DBSCAN radius scaled to the data cloud.
+#  Spectral clustering uses the nearest neighbor affinity, the RBF kernel with gamma 1 degenerates on coordinates
+#  in the tens of thousands. Warm starts are off, so repeated runs time a full fit.
+# @param algorithm Name of the clustering algorithm
+# @param data Data cloud
+def benchmark_params(algorithm, data):
+    params = CLUSTERINGS[algorithm][1]()
+    n_clusters = min(5, len(data) - 1)
+    if algorithm == "kmeans":
+        params = replace(params, n_clusters=n_clusters, algorithm="lloyd", warm_start=False)
+    elif algorithm == "spectral":
+        params = replace(params, n_clusters=n_clusters, affinity="nearest_neighbors", n_neighbors=min(params.n_neighbors, len(data) - 1), warm_start=False)
+    elif algorithm in ("hierarchical", "minibatch_kmeans", "birch", "sampled"):
+        params = replace(params, n_clusters=n_clusters)
+    elif algorithm == "dbscan":
+        extent = np.ptp(data, axis=0)
+        params = replace(params, eps=float(2 * np.hypot(*extent[:2]) / np.sqrt(len(data))), min_samples=min(5, len(data)))
+    return params
+
+
+## Run a function, measure its wall time and peak memory
+#  Wall time is the best of the repeats, peak memory is measured with tracemalloc in one more run
+#  so the tracing overhead is not in the wall time. In-memory caches (linkage trees, neighbor graphs, warm starts)
+#  are cleared before every run, so every run is a cold fit.
+# @param function Function without arguments
+# @param repeat Number of timed runs
+# @return Return value of the last run, wall time in seconds, peak memory in bytes
+def measure(function, repeat=1):
+    wall_time = float("inf")
+    for _ in range(repeat):
+        clear_caches()
+        start = time.perf_counter()
+        result = function()
+        wall_time = min(wall_time, time.perf_counter() - start)
+    clear_caches()
+    tracemalloc.start()
+    try:
+        function()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, wall_time, peak_memory
+
+
+## Record of one benchmark
+def record(instance, n_nodes, kind, name, status="ok", **metrics):
+    return {"instance": instance, "n_nodes": n_nodes, "kind": kind, "name": name, "status": status,
+            **{metric: metrics.get(metric) for metric in METRICS}, **{key: value for key, value in metrics.items() if key not in METRICS}}
+
+
+## Benchmark the clustering algorithms on a data cloud
+#  @return List of records and the K-means solution, which is the initial solution of the heuristics
+def benchmark_clustering(instance, data, distances, algorithms, repeat):
+    records = list()
+    initial_solution = None
+    for algorithm in algorithms:
+        max_nodes = MAX_NODES.get(algorithm)
+        if max_nodes is not None and len(data) > max_nodes:
+            records.append(record(instance, len(data), "clustering", algorithm, "skipped", reason=f"more than {max_nodes} nodes"))
+            continue
+        clustering_class = CLUSTERINGS[algorithm][0]
+        params = benchmark_params(algorithm, data)
+        try:
+            operation, wall_time, peak_memory = measure(lambda: clustering_class(data, params, distances=distances), repeat)
+            ch = operation.get_cluster_holder()
+            records.append(record(instance, len(data), "clustering", algorithm, wall_time=wall_time, peak_memory=peak_memory,
+                                  objective=float(ch.calculate_objective_function()), n_clusters=ch.n_clusters))
+            if algorithm == "kmeans":
+                initial_solution = ch
+        except Exception as e:
+            records.append(record(instance, len(data), "clustering", algorithm, "error", reason=f"{type(e).__name__}: {e}"))
+    return records, initial_solution
+
+
+## Benchmark the heuristics on an initial solution
+#  Every heuristic runs a fixed number of iterations with a fixed seed, so runs are comparable
+def benchmark_heuristics(instance, initial_solution, heuristics, n_iterations, repeat):
+    records = list()
+    n_nodes = len(initial_solution.data)
+    for name in heuristics:
+        def run():
+            return HEURISTICS[name](initial_solution.copy(), n_iterations=n_iterations, seed=0).run()
+        try:
+            h, wall_time, peak_memory = measure(run, repeat)
+            records.append(record(instance, n_nodes, "heuristic", name, wall_time=wall_time, peak_memory=peak_memory,
+                                  objective=float(h.best_score), evaluations_per_second=h.iteration / wall_time,
+                                  initial_objective=float(h.initial_score), iterations=h.iteration))
+        except Exception as e:
+            records.append(record(instance, n_nodes, "heuristic", name, "error", reason=f"{type(e).__name__}: {e}"))
+    return records
+
+
+## Run the benchmark suite
+# @param sizes Number of nodes of the generated data clouds
+# @param algorithms Names of the clustering algorithms
+# @param heuristics Names of the heuristics
+# @param n_iterations Number of iterations of every heuristic run
+# @param repeat Number of timed runs of every benchmark
+# @param max_matrix_nodes Largest data cloud a distance matrix is built for, Euclidean distances are computed above it
+# @param verbose Print a summary line per benchmark
+# @return Results dictionary
+def run_benchmarks(sizes, algorithms, heuristics, n_iterations=2000, repeat=1, max_matrix_nodes=MAX_MATRIX_NODES, verbose=True):
+    cache, Clustering.cache = Clustering.cache, None  # measure the algorithms, not the cache
+    results = list()
+    try:
+        for instance, data in load_instances(sizes):
+            distances = default_distances(data, max_matrix_nodes)
+            records, initial_solution = benchmark_clustering(instance, data, distances, algorithms, repeat)
+            if initial_solution is None and heuristics:  # K-means is not benchmarked, only its solution is needed
+                initial_solution = CLUSTERINGS["kmeans"][0](data, benchmark_params("kmeans", data), distances=distances).get_cluster_holder()
+            if heuristics:
+                records += benchmark_heuristics(instance, initial_solution, heuristics, n_iterations, repeat)
+            if verbose:
+                for r in records:
+                    print(format_record(r))
+            results += records
+    finally:
+        Clustering.cache = cache
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "sklearn": sklearn.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "n_iterations": n_iterations,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+## One line summary of a record
+def format_record(r):
+    if r["status"] != "ok":
+        return f"{r['instance']:>14} {r['kind']:>10} {r['name']:>20}  {r['status']} ({r.get('reason')})"
+    line = f"{r['instance']:>14} {r['kind']:>10} {r['name']:>20}  {r['wall_time']:9.3f} s  {r['peak_memory'] / 2 ** 20:9.1f} MiB  objective {r['objective']:.3f}"
+    if r["evaluations_per_second"] is not None:
+        line += f"  {r['evaluations_per_second']:.0f} evaluations/s"
+    return line
+
+
+## Compare two results files
+#  A metric regresses when it is worse than in the base results by more than the threshold (relative).
+#  Wall time and evaluations per second of very short runs are noisy, they are compared only above min_time seconds.
+# @param base Base results dictionary
+# @param new New results dictionary
+# @param threshold Relative tolerance, e.g. 0.1 for 10%
+# @param min_time Shortest wall time to compare timings of
+# @return List of (instance, kind, name, metric, base value, new value, relative change) of the regressions
+def compare_results(base, new, threshold=0.1, min_time=0.05):
+    base_records = {(r["instance"], r["kind"], r["name"]): r for r in base["results"] if r["status"] == "ok"}
+    regressions = list()
+    for r in new["results"]:
+        key = (r["instance"], r["kind"], r["name"])
+        b = base_records.get(key)
+        if b is None:
+            continue
+        if r["status"] != "ok":
+            regressions.append((*key, "status", "ok", r["status"], None))
+            continue
+        for metric, larger_is_better in METRICS.items():
+            old_value, new_value = b.get(metric), r.get(metric)
+            if old_value is None or new_value is None or old_value == 0:
+                continue
+            if metric in ("wall_time", "evaluations_per_second") and max(b["wall_time"], r["wall_time"]) < min_time:
+                continue
+            change = (new_value - old_value) / abs(old_value)
+            if (change < -threshold) if larger_is_better else (change > threshold):
+                regressions.append((*key, metric, old_value, new_value, change))
+    return regressions
+
+
+## Command line entry point
+# @param argv Command line arguments, sys.argv when None
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark clustering algorithms and heuristics")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("-o", "--output", default="benchmark_results.json", help="results file")
+    run_parser.add_argument("--sizes", type=int, nargs="*", default=[1000, 10000, 100000], help="number of nodes of the generated data clouds")
+    run_parser.add_argument("--algorithms", nargs="*", choices=CLUSTERINGS, default=list(CLUSTERINGS), help="clustering algorithms")
+    run_parser.add_argument("--heuristics", nargs="*", choices=HEURISTICS, default=list(HEURISTICS), help="heuristics")
+    run_parser.add_argument("--iterations", type=int, default=2000, help="number of iterations of every heuristic run")
+    run_parser.add_argument("--repeat", type=int, default=1, help="number of timed runs, best time is kept")
+    run_parser.add_argument("--max-matrix-nodes", type=int, default=MAX_MATRIX_NODES, help="largest data cloud to build a distance matrix for")
+
+    compare_parser = subparsers.add_parser("compare", help="compare two results files")
+    compare_parser.add_argument("base", help="base results file")
+    compare_parser.add_argument("new", help="new results file")
+    compare_parser.add_argument("--threshold", type=float, default=0.1, help="relative tolerance of the metrics")
+    compare_parser.add_argument("--min-time", type=float, default=0.05, help="shortest wall time to compare timings of")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        results = run_benchmarks(args.sizes, args.algorithms, args.heuristics, args.iterations, args.repeat, args.max_matrix_nodes)
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        return 0
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    regressions = compare_results(base, new, args.threshold, args.min_time)
+    for instance, kind, name, metric, old_value, new_value, change in regressions:
+        if change is None:
+            print(f"REGRESSION {instance} {kind} {name}: {metric} {old_value} --> {new_value}")
+        else:
+            print(f"REGRESSION {instance} {kind} {name}: {metric} {old_value:.6g} --> {new_value:.6g} ({change:+.1%})")
+    print(f"{len(regressions)} regression(s)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+## @package cache
+#  Caches of clustering results and intermediate structures
+#  Clustering results are keyed by the fingerprint of the data cloud, the clustering algorithm and its parameters.
+#  Recently used results are kept in memory, optionally all results are also kept on disk under a size limit.
+#  LRUCache is the in-memory cache of linkage trees, neighbor graphs and warm starts too.
+
+import hashlib
+import os
+import threading
+import weakref
+from collections import OrderedDict
+import numpy as np
+
+
+## Fingerprint of a data cloud, hash of its shape, type and content
+# @param data Data cloud
+def data_fingerprint(data):
+    data = np.ascontiguousarray(data)
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"{data.shape}{data.dtype.str}".encode())
+    digest.update(memoryview(data).cast("B"))
+    return digest.hexdigest()
+
+
+_lru_caches = weakref.WeakSet()  # every LRUCache, see clear_caches
+
+
+## Least recently used cache holding at most max_entries values
+#  Thread safe, clustering runs on worker threads
+class LRUCache:
+    ## Constructor
+    # @param max_entries Number of values kept
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        _lru_caches.add(self)
+
+    ## Look up a value and mark it as recently used
+    #  @return Value or None if it is not cached
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    ## Store a value, evict the least recently used values above max_entries
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    ## Remove every value
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+## Clear every LRUCache, e.g. so that a measured fit builds its linkage tree or neighbor graph again
+def clear_caches():
+    for cache in list(_lru_caches):
+        cache.clear()
+
+
+## Cache of clustering labels and cluster centers
+#  In-memory tier is a least recently used cache of max_entries results. If disk_dir is set, results are
+#  also written there and the least recently used files are removed when the directory grows above max_disk_bytes.
+class ClusteringCache:
+    ## Constructor
+    # @param max_entries Number of results kept in memory
+    # @param disk_dir Directory of the on-disk tier, None for memory only
+    # @param max_disk_bytes Size limit of the on-disk tier in bytes
+    def __init__(self, max_entries=32, disk_dir=None, max_disk_bytes=256 * 2 ** 20):
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.entries = LRUCache(max_entries)  # in-memory tier
+        self.lock = threading.Lock()  # guards the statistics, clustering runs on worker threads
+        self.hits = 0
+        self.misses = 0
+
+    ## Key of a clustering result
+    # @param data Data cloud
+    # @param algorithm Name of the clustering algorithm
+    # @param params Parameters dataclass of the algorithm
+    def key(self, data, algorithm, params):
+        return hashlib.blake2b(f"{data_fingerprint(data)}:{algorithm}:{params!r}".encode(), digest_size=20).hexdigest()
+
+    ## Look up a result
+    #  @return (labels, centers) or None if the result is not cached, centers are None if the algorithm has none
+    def get(self, key):
+        result = self.entries.get(key)
+        if result is None:
+            result = self.read(key)
+            if result is not None:
+                self.entries.put(key, result)
+        with self.lock:
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return result
+
+    ## Store a result
+    # @param labels Cluster index of every node
+    # @param centers Cluster centers, None if the algorithm has none
+    def put(self, key, labels, centers=None):
+        result = (np.array(labels), None if centers is None else np.array(centers))
+        self.entries.put(key, result)
+        self.write(key, result)
+
+    ## Path of a result in the on-disk tier
+    def path(self, key):
+        return os.path.join(self.disk_dir, key + ".npz")
+
+    ## Read a result from the on-disk tier
+    #  @return (labels, centers) or None
+    def read(self, key):
+        if self.disk_dir is None:
+            return None
+        try:
+            with np.load(self.path(key)) as f:
+                result = (f["labels"], f["centers"] if "centers" in f else None)
+            os.utime(self.path(key))  # modification time is the last use time of the file
+            return result
+        except (OSError, ValueError, KeyError):
+            return None
+
+    ## Write a result to the on-disk tier and keep the tier under its size limit
+    def write(self, key, result):
+        if self.disk_dir is None:
+            return
+        labels, centers = result
+        arrays = {"labels": labels} if centers is None else {"labels": labels, "centers": centers}
+        try:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            temporary = f"{self.path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temporary, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(temporary, self.path(key))
+            self.evict_disk()
+        except OSError:
+            pass  # on-disk tier is optional, e.g. on a read-only file system
+
+    ## Remove the least recently used files until the on-disk tier is under its size limit
+    def evict_disk(self):
+        files = list()
+        for name in os.listdir(self.disk_dir):
+            if name.endswith(".npz"):
+                stat = os.stat(os.path.join(self.disk_dir, name))
+                files.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in files)
+        for _, size, name in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            os.remove(os.path.join(self.disk_dir, name))
+            total -= size
+
+    ## Remove every result, from memory and disk
+    def clear(self):
+        self.entries.clear()
+        if self.disk_dir is not None and os.path.isdir(self.disk_dir):
+            for name in os.listdir(self.disk_dir):
+                if name.endswith(".npz"):
+                    os.remove(os.path.join(self.disk_dir, name))
+
+
+## Cache used by the clustering algorithms, memory only by default
+clustering_cache = ClusteringCache()
@@ -1,24 +1,50 @@
-from sklearn.cluster import KMeans, AffinityPropagation, MeanShift, SpectralClustering, AgglomerativeClustering, DBSCAN
-import matplotlib.pyplot as plt
+from sklearn.cluster import KMeans, AffinityPropagation, MeanShift, SpectralClustering, DBSCAN, MiniBatchKMeans, Birch
+from sklearn.neighbors import KDTree
+from sklearn.manifold import spectral_embedding
+from sklearn.metrics.pairwise import rbf_kernel
+from dataclasses import fields
 import numpy as np
 from utils import ClusterHolder
-from params import AffinityParams, MeanShiftParams, KMeansParams, SpectralParams, HierarchicalParams, DBSCANParams
+from plotting import new_figure, plot_cluster_holder
+from cache import clustering_cache
+from linkage import linkage_tree
+from neighbors import neighbor_graph, knn_affinity
+from warmstart import previous_labels, remember_labels, initial_centers
+from params import AffinityParams, MeanShiftParams, KMeansParams, SpectralParams, HierarchicalParams, DBSCANParams, MiniBatchKMeansParams, BirchParams, SampledParams
 
 ## Base class for clustering algorithms
+#  Constructor only computes the clustering, it touches the GUI only when a driver is given.
+#  To compute off the GUI thread, construct without ui and driver and call show() on the GUI thread afterwards.
+#  Results are memoized in cache (see cache.py), set cache to None to always fit the algorithm.
 class Clustering:
-    def __init__(self, data, params, ui, driver):
-        self.colorspace = np.array(
-            ["purple", "cyan", "green", "orange", "brown", "gray", "magenta", "blue", "yellow", "pink"])
+    cache = clustering_cache
+
+    ## Constructor
+    # @param ui Ui_MainWindow, optional
+    # @param driver Driver, optional. If given, result is shown right away
+    # @param distances Distance oracle of the data cloud (see distances.py), optional
+    def __init__(self, data, params, ui=None, driver=None, distances=None):
         self.params = params
         self.data = data
         self.labels = None
+        self.centers = None
         self.clustering = None
+        self.figure = None
+        self.ui = ui
+        self.driver = driver
+        self.distances = distances
+        self.fit()
+        self.cluster = ClusterHolder(self.data, self.labels, distances=self.distances)
+        if self.driver is not None:
+            self.show(ui, driver)
+
+    ## Show the result on the GUI, must be called on the GUI thread
+    #  Print parameters and labels, plot the clusters and update initial solution graph
+    def show(self, ui, driver):
         self.ui = ui
         self.driver = driver
         self.print_params()
-        self.get_clustering()
-        self.find_labels()
-        self.cluster = ClusterHolder(self.data, self.labels)
+        self.print_labels()
         self.plot_clustering()
         self.__post_init__()
 
@@ -26,12 +52,26 @@ class Clustering:
     #  Check buttons and update initial solution graph
     def __post_init__(self):
         self.driver.check_buttons()
-        self.driver.update_input_image()
+        self.driver.update_input_image(self.figure)
 
     ## Create an instance of ClusterHolder to hold and manipulate all clusters
     def get_cluster_holder(self):
         return self.cluster
 
+    ## Apply clustering, or take the labels from the cache if the same clustering was done before
+    #  Estimator (self.clustering) is None when the result comes from the cache
+    def fit(self):
+        key = self.cache.key(self.data, type(self).__name__, self.params) if self.cache is not None else None
+        cached = self.cache.get(key) if key is not None else None
+        if cached is not None:
+            self.labels, self.centers = cached
+            return
+        self.get_clustering()
+        self.find_labels()
+        self.centers = getattr(self.clustering, "cluster_centers_", None)
+        if key is not None:
+            self.cache.put(key, self.labels, self.centers)
+
     ## Apply clustering
     #  Override this function
     def get_clustering(self): 
@@ -45,6 +85,9 @@ class Clustering:
     ## Find out which cluster the points belong to
     def find_labels(self):
         self.labels = self.clustering.labels_
+
+    ## Print clustering labels into left info panel
+    def print_labels(self):
         self.driver.print_info("\nClustering labels")
         self.driver.print_info(self.labels)
 
@@ -53,39 +96,39 @@ class Clustering:
     #  Center nodes with red dot
     #  Same clusters points having same color
     def plot_clustering(self):
-        plt.clf()
-        for index, i in enumerate(self.cluster.clusters):
-            plt.scatter(i.center_point[0], i.center_point[1], color="red", marker="x", s=130)
+        self.figure = new_figure()
+        plot_cluster_holder(self.cluster, self.figure.add_subplot())
 
-        for i, (X, Y) in enumerate(self.data):
-            plt.scatter(X, Y, color=self.colorspace[self.labels[i] % len(self.colorspace)])
-            plt.annotate(i, (X, Y))
 
-        for cluster in self.cluster.clusters:
-            plt.scatter(cluster.central_node[0], cluster.central_node[1], color='red')
-
-
-        plt.savefig("resources/temp/input.png")
-        # plt.show()
+## Names of K-means algorithms removed from scikit-learn, mapped to the algorithm they were aliases of
+KMEANS_ALGORITHMS = {"auto": "lloyd", "full": "lloyd"}
 
 
 ## Apply K-Means clustering algorithm
+#  Warm started from the previous fit on the same data cloud when only n_clusters or max_iter changed (see warmstart.py)
 class ClusterKMeans(Clustering):
-    def __init__(self, data, params, ui, driver):
-        super().__init__(data, params, ui, driver)
+    def __init__(self, data, params, ui=None, driver=None, distances=None):
+        super().__init__(data, params, ui, driver, distances)
 
     def print_params(self):
         self.driver.print_info("\nK-means parameters")
         self.driver.print_info(self.params)
 
     def get_clustering(self):
-        self.clustering = KMeans(n_clusters=self.params.n_clusters, init=self.params.init, max_iter=self.params.max_iter, algorithm=self.params.algorithm).fit(self.data)
+        algorithm = KMEANS_ALGORITHMS.get(self.params.algorithm, self.params.algorithm)
+        labels = previous_labels(self.data, "kmeans", self.params) if self.params.warm_start else None
+        if labels is None:
+            self.clustering = KMeans(n_clusters=self.params.n_clusters, init=self.params.init, max_iter=self.params.max_iter, algorithm=algorithm).fit(self.data)
+        else:
+            self.clustering = KMeans(n_clusters=self.params.n_clusters, init=initial_centers(self.data, labels, self.params.n_clusters), n_init=1,
+                                     max_iter=self.params.max_iter, algorithm=algorithm).fit(self.data)
+        remember_labels(self.data, "kmeans", self.params, self.clustering.labels_)
 
 
 ## Apply Affinity Propagation clustering algorithm
 class ClusterAffinity(Clustering):
-    def __init__(self, data, params, ui, driver):
-        super().__init__(data, params, ui, driver)
+    def __init__(self, data, params, ui=None, driver=None, distances=None):
+        super().__init__(data, params, ui, driver, distances)
 
     def print_params(self):
         self.driver.print_info("\nAffinity propagation parameters")
@@ -98,8 +141,8 @@ class ClusterAffinity(Clustering):
 
 ## Apply Mean-Shift clustering algorithm
 class ClusterMeanShift(Clustering):
-    def __init__(self, data, params, ui, driver):
-        super().__init__(data, params, ui, driver)
+    def __init__(self, data, params, ui=None, driver=None, distances=None):
+        super().__init__(data, params, ui, driver, distances)
 
     def print_params(self):
         self.driver.print_info("\nMean shift parameters")
@@ -110,39 +153,155 @@ class ClusterMeanShift(Clustering):
 
 
 ## Apply Spectral clustering algorithm
+#  With the 'nearest_neighbors' affinity the sparse k-NN affinity matrix is cached (see neighbors.py) and reused
+#  for any number of clusters. With kmeans label assignment the k-means stage is warm started from the clusters
+#  of the previous fit on the same data cloud when only n_clusters or n_components changed (see warmstart.py).
 class ClusterSpectral(Clustering):
-    def __init__(self, data, params, ui, driver):
-        super().__init__(data, params, ui, driver)
+    def __init__(self, data, params, ui=None, driver=None, distances=None):
+        super().__init__(data, params, ui, driver, distances)
 
     def print_params(self):
         self.driver.print_info("\nSpectral clustering parameters")
         self.driver.print_info(self.params)
 
     def get_clustering(self):
-        self.clustering = SpectralClustering(n_clusters=self.params.n_clusters, n_components=self.params.n_components, n_init=self.params.n_init, assign_labels=self.params.assign_labels).fit(self.data)
+        labels = None
+        if self.params.warm_start and self.params.assign_labels == "kmeans" and self.params.affinity in ("rbf", "nearest_neighbors"):
+            labels = previous_labels(self.data, "spectral", self.params, free=("n_clusters", "n_components"))
+        if labels is not None:
+            self.warm_start(labels)
+        elif self.params.affinity == "nearest_neighbors":
+            self.clustering = SpectralClustering(n_clusters=self.params.n_clusters, n_components=self.params.n_components, n_init=self.params.n_init, assign_labels=self.params.assign_labels,
+                                                 affinity="precomputed", eigen_solver=self.params.eigen_solver).fit(knn_affinity(self.data, self.params.n_neighbors))
+        else:
+            self.clustering = SpectralClustering(n_clusters=self.params.n_clusters, n_components=self.params.n_components, n_init=self.params.n_init, assign_labels=self.params.assign_labels,
+                                                 affinity=self.params.affinity, eigen_solver=self.params.eigen_solver).fit(self.data)
+        remember_labels(self.data, "spectral", self.params, self.clustering.labels_)
+
+    ## Fit the steps of SpectralClustering one by one, the k-means stage starts from the previous clusters
+    # @param labels Cluster index of every node from the previous fit
+    def warm_start(self, labels):
+        if self.params.affinity == "nearest_neighbors":
+            affinity = knn_affinity(self.data, self.params.n_neighbors)
+        else:
+            affinity = rbf_kernel(self.data, gamma=1.0)
+        embedding = spectral_embedding(affinity, n_components=self.params.n_components or self.params.n_clusters, eigen_solver=self.params.eigen_solver, drop_first=False)
+        k_means = KMeans(n_clusters=self.params.n_clusters, init=initial_centers(embedding, labels, self.params.n_clusters), n_init=1).fit(embedding)
+        self.clustering = SpectralClustering(n_clusters=self.params.n_clusters, n_components=self.params.n_components, n_init=self.params.n_init, assign_labels=self.params.assign_labels,
+                                             affinity=self.params.affinity, eigen_solver=self.params.eigen_solver)
+        self.clustering.labels_ = k_means.labels_
 
 
 ## Apply Hierarchical clustering algorithm
+#  Linkage tree is built once per data cloud and linkage setting (see linkage.py), other numbers of clusters only cut it
 class ClusterHierarchical(Clustering):
-    def __init__(self, data, params, ui, driver):
-        super().__init__(data, params, ui, driver)
+    def __init__(self, data, params, ui=None, driver=None, distances=None):
+        super().__init__(data, params, ui, driver, distances)
 
     def print_params(self):
         self.driver.print_info("\nHierarchical clustering parameters")
         self.driver.print_info(self.params)
 
     def get_clustering(self):
-        self.clustering = AgglomerativeClustering(n_clusters=self.params.n_clusters, affinity=self.params.affinity, linkage=self.params.linkage).fit(self.data)
+        self.clustering = linkage_tree(self.data, self.params.linkage, self.params.affinity)
+
+    def find_labels(self):
+        self.labels = self.clustering.cut(self.params.n_clusters)
 
 
 ## Apply DBSCAN clustering algorithm
+#  Neighbors are taken from a cached radius neighbor graph (see neighbors.py), so fits with other eps
+#  (up to the radius of the graph) and min_samples do not search the neighbors again
 class ClusterDBSCAN(Clustering):
-    def __init__(self, data, params, ui, driver):
-        super().__init__(data, params, ui, driver)
+    def __init__(self, data, params, ui=None, driver=None, distances=None):
+        super().__init__(data, params, ui, driver, distances)
 
     def print_params(self):
         self.driver.print_info("\nDbscan clustering parameters")
         self.driver.print_info(self.params)
 
     def get_clustering(self):
-        self.clustering = DBSCAN(eps=self.params.eps, min_samples=self.params.min_samples, algorithm=self.params.algorithm, p=self.params.p).fit(self.data)
\ No newline at end of file
+        graph = neighbor_graph(self.data, self.params.eps, algorithm=self.params.algorithm, radius=self.params.graph_eps)  # Euclidean, p is not used
+        self.clustering = DBSCAN(eps=self.params.eps, min_samples=self.params.min_samples, metric="precomputed").fit(graph.graph)
+
+## Apply Mini-Batch K-Means clustering algorithm
+#  K-means on small random batches, time and memory do not grow with the square of the number of nodes
+class ClusterMiniBatchKMeans(Clustering):
+    def __init__(self, data, params, ui=None, driver=None, distances=None):
+        super().__init__(data, params, ui, driver, distances)
+
+    def print_params(self):
+        self.driver.print_info("\nMini-batch k-means parameters")
+        self.driver.print_info(self.params)
+
+    def get_clustering(self):
+        self.clustering = MiniBatchKMeans(n_clusters=self.params.n_clusters, batch_size=self.params.batch_size, max_iter=self.params.max_iter,
+                                          n_init=self.params.n_init, random_state=self.params.random_state).fit(self.data)
+
+
+## Apply BIRCH clustering algorithm
+#  Nodes are summarized in a CF tree of subclusters in one pass, then the subclusters are clustered
+class ClusterBirch(Clustering):
+    def __init__(self, data, params, ui=None, driver=None, distances=None):
+        super().__init__(data, params, ui, driver, distances)
+
+    def print_params(self):
+        self.driver.print_info("\nBIRCH parameters")
+        self.driver.print_info(self.params)
+
+    def get_clustering(self):
+        threshold = self.params.threshold
+        if threshold is None:
+            threshold = float(np.linalg.norm(np.ptp(self.data, axis=0))) / 100
+        self.clustering = Birch(n_clusters=self.params.n_clusters, threshold=threshold, branching_factor=self.params.branching_factor).fit(self.data)
+
+
+## Apply a clustering algorithm on a random sample of the data cloud
+#  Other nodes are assigned to the cluster of their nearest sampled node, so algorithms that need O(n^2) memory
+#  (affinity propagation, spectral, hierarchical) run in bounded memory on large data clouds.
+class ClusterSampled(Clustering):
+    def __init__(self, data, params, ui=None, driver=None, distances=None):
+        super().__init__(data, params, ui, driver, distances)
+
+    def print_params(self):
+        self.driver.print_info("\nSampled clustering parameters")
+        self.driver.print_info(self.params)
+
+    def get_clustering(self):
+        clustering_class, params_class = CLUSTERINGS[self.params.algorithm]
+        params = dict(self.params.params or {})
+        if "n_clusters" in (f.name for f in fields(params_class)):
+            params.setdefault("n_clusters", self.params.n_clusters)
+        self.clustering = clustering_class(self.sample(), params_class(**params))
+
+    ## Random sample of the data cloud, whole data cloud if it is not larger than sample_size
+    def sample(self):
+        if len(self.data) <= self.params.sample_size:
+            self.sample_nodes = np.arange(len(self.data))
+        else:
+            rng = np.random.default_rng(self.params.random_state)
+            self.sample_nodes = np.sort(rng.choice(len(self.data), self.params.sample_size, replace=False))
+        return self.data[self.sample_nodes]
+
+    ## Every node gets the label of its nearest sampled node
+    def find_labels(self):
+        sample_labels = self.clustering.labels
+        if len(self.sample_nodes) == len(self.data):
+            self.labels = sample_labels
+            return
+        nearest = KDTree(self.data[self.sample_nodes]).query(self.data, k=1, return_distance=False)[:, 0]
+        self.labels = sample_labels[nearest]
+
+
+## Clustering algorithms by name, with their parameters dataclass
+CLUSTERINGS = {
+    "kmeans": (ClusterKMeans, KMeansParams),
+    "affinity": (ClusterAffinity, AffinityParams),
+    "meanshift": (ClusterMeanShift, MeanShiftParams),
+    "spectral": (ClusterSpectral, SpectralParams),
+    "hierarchical": (ClusterHierarchical, HierarchicalParams),
+    "dbscan": (ClusterDBSCAN, DBSCANParams),
+    "minibatch_kmeans": (ClusterMiniBatchKMeans, MiniBatchKMeansParams),
+    "birch": (ClusterBirch, BirchParams),
+    "sampled": (ClusterSampled, SampledParams),
+}
@@ -0,0 +1,89 @@
+## @package dataio
+#  Loads data clouds from text, NumPy and raw binary files
+#  Parsed text files are cached as *.npy files keyed by the hash of the file content,
+#  so reopening the same data cloud maps the cached array instead of parsing the text again.
+
+import hashlib
+import os
+import numpy as np
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "hub_allocation")
+
+## Extensions of text files
+TEXT_EXTENSIONS = (".txt", ".csv")
+
+## Extensions of raw binary files, float64 values row by row
+BINARY_EXTENSIONS = (".bin", ".dat")
+
+
+## Content hash of a file
+# @param path Path of the file
+# @param block_size Number of bytes read at once
+def file_hash(path, block_size=2 ** 20):
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+## Parse a text file, one node per line
+#  Values are separated by whitespace, commas or semicolons. Lines starting with # and a header line are skipped.
+#  Parsing is done by the C parser of np.loadtxt.
+# @param path Path of the file
+# @return n x d float64 array
+def parse_text(path):
+    first, n_lines = "", 0
+    with open(path) as f:
+        for line in f:
+            n_lines += 1
+            if line.strip() and not line.lstrip().startswith("#"):
+                first = line
+                break
+    delimiter = next((d for d in (",", ";") if d in first), None)
+    try:
+        [float(value) for value in first.split(delimiter) if value.strip()]
+        skiprows = 0
+    except ValueError:
+        skiprows = n_lines  # header line and the comments before it
+    return np.loadtxt(path, delimiter=delimiter, comments="#", skiprows=skiprows, ndmin=2, dtype=np.float64)
+
+
+## Load a data cloud
+#  *.npy files are memory-mapped, *.bin and *.dat files are memory-mapped as raw float64 values,
+#  *.txt and *.csv files are parsed once and then loaded from the cache.
+# @param path Path of the data file
+# @param cache_dir Directory of the parsed data cache, None to disable the cache
+# @param n_columns Number of values per node in raw binary files
+# @return n x d array, read-only memory-mapped unless a text file is parsed
+def load_data(path, cache_dir=DEFAULT_CACHE_DIR, n_columns=2):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".npy":
+        return np.load(path, mmap_mode="r")
+    if extension in BINARY_EXTENSIONS:
+        return np.memmap(path, dtype=np.float64, mode="r").reshape(-1, n_columns)
+    if cache_dir is None:
+        return parse_text(path)
+
+    cached = os.path.join(cache_dir, file_hash(path) + ".npy")
+    if os.path.exists(cached):
+        return np.load(cached, mmap_mode="r")
+    data = parse_text(path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        temporary = f"{cached}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            np.save(f, data)
+        os.replace(temporary, cached)  # concurrent instances never see a partially written cache file
+    except OSError:
+        pass  # cache is optional, e.g. on a read-only file system
+    return data
+
+
+## Remove every cached array
+# @param cache_dir Directory of the parsed data cache
+def clear_cache(cache_dir=DEFAULT_CACHE_DIR):
+    if os.path.isdir(cache_dir):
+        for name in os.listdir(cache_dir):
+            if name.endswith(".npy"):
+                os.remove(os.path.join(cache_dir, name))
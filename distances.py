@@ -0,0 +1,145 @@
+## @package distances
+#  Distance oracles between the nodes of a data cloud
+#  ClusterHolder, the objective function and heuristics read all node-to-node distances from an oracle,
+#  so a precomputed matrix (or a road-network distance matrix) can replace straight-line distance.
+
+import os
+import tempfile
+import weakref
+import numpy as np
+
+
+## Computes straight-line (Euclidean) distances from coordinates on every call
+#  Used when no distance matrix is built
+class EuclideanDistances:
+    ## Constructor
+    # @param data Data cloud
+    def __init__(self, data):
+        self.data = data
+
+    ## Distances between node a and node(s) b
+    # @param a Index of a node in the data cloud
+    # @param b Index or array of indices of nodes in the data cloud
+    def between(self, a, b):
+        diff = self.data[b] - self.data[a]
+        return np.sqrt(np.sum(diff ** 2, axis=-1))
+
+    ## Distance matrix between given rows and columns of nodes
+    # @param rows Array of node indices
+    # @param cols Array of node indices
+    def pairwise(self, rows, cols):
+        diff = self.data[rows][:, np.newaxis, :] - self.data[cols][np.newaxis, :, :]
+        return np.sqrt(np.sum(diff ** 2, axis=-1))
+
+
+## Precomputed all-pairs distance matrix, every lookup is O(1)
+#  Matrix is either an in-memory array or a disk-backed np.memmap
+class DistanceMatrix:
+    ## Constructor
+    # @param matrix n x n distance matrix (np.ndarray or np.memmap)
+    # @param path Path of the file backing the matrix, if any
+    # @param temporary If True, backing file is deleted when the matrix is garbage collected
+    def __init__(self, matrix, path=None, temporary=False):
+        self.matrix = matrix
+        self.path = path
+        if temporary and path is not None:
+            weakref.finalize(self, remove_file, path)
+
+    ## Matrix is read-only, copies of a ClusterHolder share it instead of copying it
+    def __deepcopy__(self, memo):
+        return self
+
+    ## Pickle a disk-backed matrix by its file instead of its content, e.g. when sent to worker processes
+    #  Unpickled copy maps the same file read-only and never deletes it, the file is owned by the original matrix
+    def __reduce__(self):
+        if isinstance(self.matrix, np.memmap) and self.path is not None:
+            return open_memmap, (self.path, self.matrix.dtype.str, self.matrix.shape, self.matrix.offset)
+        return DistanceMatrix, (self.matrix,)
+
+    ## Distances between node a and node(s) b
+    def between(self, a, b):
+        return self.matrix[a, b]
+
+    ## Distance matrix between given rows and columns of nodes
+    def pairwise(self, rows, cols):
+        return self.matrix[np.ix_(rows, cols)]
+
+    ## Load a distance matrix from file, e.g. road-network distances
+    #  *.npy files are memory-mapped, other files are read as text
+    # @param path Path of the matrix file
+    # @param n_nodes Number of nodes of the data cloud, the matrix must be n_nodes x n_nodes when given
+    @classmethod
+    def from_file(cls, path, n_nodes=None):
+        if path.endswith(".npy"):
+            matrix = np.load(path, mmap_mode="r")
+        else:
+            matrix = np.loadtxt(path, dtype=np.float32, ndmin=2)
+        if matrix.ndim != 2 or matrix.shape[0] != matrix.shape[1]:
+            raise ValueError(f"Distance matrix {path} must be square, got shape {matrix.shape}")
+        if n_nodes is not None and matrix.shape[0] != n_nodes:
+            raise ValueError(f"Distance matrix {path} is {matrix.shape[0]} x {matrix.shape[1]}, data cloud has {n_nodes} nodes")
+        return cls(matrix, path=path if isinstance(matrix, np.memmap) else None)
+
+
+## Map a matrix file read-only
+# @param path Path of the matrix file
+# @param dtype Data type of the matrix
+# @param shape Shape of the matrix
+# @param offset Offset of the matrix in the file in bytes
+# @return DistanceMatrix
+def open_memmap(path, dtype, shape, offset=0):
+    return DistanceMatrix(np.memmap(path, dtype=dtype, mode="r", shape=shape, offset=offset), path=path)
+
+
+## Remove a file if it exists
+def remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+## Build all-pairs Euclidean distance matrix of a data cloud
+#  Dense float32 matrix in memory for small data clouds, np.memmap on disk for large ones.
+#  Rows are computed in blocks so the temporary arrays stay small.
+# @param data Data cloud
+# @param max_dense_nodes Largest number of nodes to keep the matrix in memory
+# @param path File to back the memmap with, a temporary file is used when not given
+# @param block_elements Number of matrix elements computed at once
+# @return DistanceMatrix
+def build_distances(data, max_dense_nodes=5000, path=None, block_elements=2 ** 22):
+    n = len(data)
+    temporary = False
+    if n <= max_dense_nodes:
+        matrix = np.empty((n, n), dtype=np.float32)
+    else:
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix="distances_", suffix=".dat")
+            os.close(fd)
+            temporary = True
+        matrix = np.memmap(path, dtype=np.float32, mode="w+", shape=(n, n))
+
+    block = max(1, block_elements // max(n, 1))
+    for start in range(0, n, block):
+        stop = min(start + block, n)
+        diff = data[start:stop, np.newaxis, :] - data[np.newaxis, :, :]
+        matrix[start:stop] = np.sqrt(np.sum(diff ** 2, axis=-1))
+
+    if isinstance(matrix, np.memmap):
+        matrix.flush()
+    return DistanceMatrix(matrix, path=path, temporary=temporary)
+
+
+## Largest data cloud an all-pairs distance matrix is built for by default, the matrix needs O(n^2) time and memory
+MAX_MATRIX_NODES = 5000
+
+
+## Default distance oracle of a data cloud
+#  In-memory distance matrix up to max_matrix_nodes nodes, above it straight-line distances are computed on demand
+# @param data Data cloud
+# @param max_matrix_nodes Largest data cloud a distance matrix is built for
+# @return DistanceMatrix or EuclideanDistances
+def default_distances(data, max_matrix_nodes=MAX_MATRIX_NODES):
+    if len(data) <= max_matrix_nodes:
+        return build_distances(data, max_dense_nodes=max_matrix_nodes)
+    return EuclideanDistances(data)
@@ -1,7 +1,7 @@
 from PyQt5 import QtGui, QtWidgets
 import numpy as np
+import zlib
 from functools import partial
-import matplotlib.pyplot as plt
 from paramwidgets.k_means_params import Ui_Form as Ui_Form_K_Means
 from paramwidgets.affinity_params import Ui_Form as Ui_Form_Affinity
 from paramwidgets.dbscan_params import Ui_Form as Ui_Form_DBSCAN
@@ -9,189 +9,270 @@ from paramwidgets.hierarchical_params import Ui_Form as Ui_Form_Hierarchical
 from paramwidgets.spectral_params import Ui_Form as Ui_Form_Spectral
 from paramwidgets.mean_shift_params import Ui_Form as Ui_Form_MeanShift
 from clustering import ClusterKMeans, ClusterAffinity, ClusterDBSCAN, ClusterMeanShift, ClusterSpectral, ClusterHierarchical
-from params import KMeansParams, MeanShiftParams, SpectralParams, AffinityParams, DBSCANParams, HierarchicalParams
-from skimage import io
+from params import KMeansParams, MeanShiftParams, SpectralParams, AffinityParams, DBSCANParams, HierarchicalParams, HeuristicsParams
 from typing import Protocol
-from heuristics import HillClimbing
-from copy import deepcopy
-from dataclasses import dataclass, field
+from heuristics import HillClimbing, SimulatedAnnealing
+from dataclasses import dataclass, field, asdict
+from distances import default_distances
+from dataio import load_data
+from workers import Worker
+from plotting import new_figure, render_figure, plot_data, plot_cluster_holder
+from utils import ClusterHolder
+
+
+## Convert a figure to QPixmap without writing it to disk
+#  QImage wraps the rendered Agg canvas buffer without copying it, QPixmap keeps its own copy
+# @param figure Figure created by plotting.new_figure
+def figure_to_pixmap(figure):
+    rgba = render_figure(figure)
+    height, width, _ = rgba.shape
+    image = QtGui.QImage(rgba.data, width, height, rgba.strides[0], QtGui.QImage.Format_RGBA8888)
+    return QtGui.QPixmap.fromImage(image)
+
+## Labels and hubs of a solution, stored compactly for undo/redo history
+#  Labels are stored as the changes to the labels of a base solution when less than half of them changed,
+#  every KEYFRAME_INTERVAL-th solution of a chain stores its labels in full, so restoring never walks a long chain.
+#  Data cloud and distances are shared with the program, they are not copied.
+class CompactSolution:
+    KEYFRAME_INTERVAL = 16
+
+    ## Constructor
+    # @param ch ClusterHolder to store
+    # @param base CompactSolution to store the label changes against, optional
+    def __init__(self, ch, base=None):
+        self.data = ch.data
+        self.distances = ch.distances
+        self.alpha = ch.alpha
+        self.hubs = ch.get_hubs().astype(np.int32)
+        self.labels = ch.labels.astype(np.int32)  # full labels, or new labels of changed nodes if base is not None
+        self.changed = None  # indices of the changed nodes
+        self.base = None
+        self.depth = 0  # number of solutions in the chain before this one
+        if base is not None and base.data is self.data and base.depth < self.KEYFRAME_INTERVAL - 1:
+            changed = np.flatnonzero(base.get_labels() != self.labels)
+            if len(changed) < len(self.labels) // 2:
+                self.labels = self.labels[changed]
+                self.changed = changed.astype(np.int32)
+                self.base = base
+                self.depth = base.depth + 1
+
+    ## Full labels of the solution
+    def get_labels(self):
+        if self.base is None:
+            return self.labels
+        labels = self.base.get_labels().copy()
+        labels[self.changed] = self.labels
+        return labels
+
+    ## Store the labels in full, called before the base solution is evicted from the history
+    def make_keyframe(self):
+        self.labels = self.get_labels()
+        self.changed = None
+        self.base = None
+        self.depth = 0
+
+    ## Rebuild the solution
+    #  @return New ClusterHolder object
+    def restore(self):
+        return ClusterHolder(self.data, self.get_labels(), alpha=self.alpha, distances=self.distances, hubs=self.hubs)
+
+    ## Memory used by the solution in bytes, shared data cloud and distances are not counted
+    def nbytes(self):
+        return self.labels.nbytes + self.hubs.nbytes + (self.changed.nbytes if self.changed is not None else 0)
+
 
 ## dataclass for holding initial solution states of the program
 #  When undoable event occurs, the programs current initial solution state is saved.
 #  When undo() is invoked, program is set to previous state
 #  When redo() is invoked, program is set to next state
-@dataclass(order=True)
+#  Plots are not stored, they are drawn again from the solution when the state is restored.
+@dataclass
 class InitialState:
-    input_image: np.array = None
-    cluster_holder = None
-    initial_info: str = ""
-    data = None
+    has_image: bool = False
+    solution: CompactSolution = None
+    params: object = None  # parameters of the clustering algorithm of the solution
+    info: bytes = b""  # compressed info text
+    data: np.ndarray = None
+    distances: object = None
 
 ## dataclass for holding final solution states of the program
 #  When undoable event occurs, the programs current final solution state is saved.
 #  When undo() is invoked, program is set to previous state
 #  When redo() is invoked, program is set to next state
-@dataclass(order=True)
+#  Plots are not stored, they are drawn again from the solution when the state is restored.
+@dataclass
 class FinalState:
-    output_image: np.array = None
-    cluster_holder_final = None
-    final_info: str = ""
+    has_image: bool = False
+    solution: CompactSolution = None
+    params: object = None  # heuristic and its budget of the solution
+    info: bytes = b""  # compressed info text
+
+
+## Compress info text of a state
+def compress_info(info):
+    return zlib.compress(info.encode(), 1)
+
+
+## Decompress info text of a state
+def decompress_info(info):
+    return zlib.decompress(info).decode() if info else ""
 
 
 ## Base class for Undo and Redo operations
+#  History is kept under a memory budget, the oldest states are evicted when it is exceeded.
 class UndoRedo:
-    def __init__(self, driver):
+    ## Constructor
+    # @param driver Driver
+    # @param memory_budget Maximum memory of the stored states in bytes
+    def __init__(self, driver, memory_budget=256 * 2 ** 20):
         self.driver = driver
+        self.memory_budget = memory_budget
         self.undo_stack = list()
         self.redo_stack = list()
         self.first_start()
 
-    def undoable_event_happened(self): # override this function
+    ## Create a state from the current state of the program
+    #  override this function
+    def current_state(self, params=None):
         ...
 
-    def first_start(self):
+    ## Set the program's state to given state
+    #  override this function
+    def restore(self, state):
         ...
 
-## Holds states of initial solution
-class UndoRedoInitial(UndoRedo):
-    def __init__(self, driver):
-        super().__init__(driver)
-
+    ## Solution of the top of undo stack, new solutions store their changes against it
+    def last_solution(self):
+        return self.undo_stack[-1].solution if self.undo_stack else None
 
     ## Pop the previous state from undo stack and push it to the redo stack
     #  Then, set the program's state to top of undo stack
     def undo(self):
-        x = None
-        try:
-            if len(self.undo_stack) > 1:
-                x = self.undo_stack.pop()
-            else:
-                print('\a')
-        except IndexError:
+        if len(self.undo_stack) > 1:
+            self.redo_stack.append(self.undo_stack.pop())
+            self.restore(self.undo_stack[-1])
+            self.driver.update_io_labels()
+            self.driver.update_info_panels()
+            self.driver.check_buttons()
+        else:
             print('\a')
-        finally:
-            if x:
-                self.redo_stack.append(x)
-                y = self.undo_stack[-1]
-                self.driver.input_image = y.input_image
-                self.driver.cluster_holder = y.cluster_holder
-                self.driver.initial_info = y.initial_info
-                self.driver.data = y.data
-                self.driver.update_io_labels()
-                self.driver.update_info_panels()
-                self.driver.check_buttons()
 
     ## Pop from the top of redo stack, then push it to the undo stack
     #  Set the current state of the program to popped state
     def redo(self):
-        x = None
-        try:
-            x = self.redo_stack.pop()
-        except IndexError:
+        if self.redo_stack:
+            self.undo_stack.append(self.redo_stack.pop())
+            self.restore(self.undo_stack[-1])
+            self.driver.update_io_labels()
+            self.driver.update_info_panels()
+            self.driver.check_buttons()
+        else:
             print('\a')
-        finally:
-            if x:
-                self.undo_stack.append(x)
-                self.driver.input_image = x.input_image
-                self.driver.cluster_holder = x.cluster_holder
-                self.driver.initial_info = x.initial_info
-                self.driver.data = x.data
-                self.driver.update_io_labels()
-                self.driver.update_info_panels()
-                self.driver.check_buttons()
 
     ## At initilization of the class push initial state with default parameters to undo stack
     #  And clear redo stack
     def first_start(self):
-        state = InitialState()
-        state.input_image = self.driver.input_image
-        state.cluster_holder = self.driver.cluster_holder
-        state.initial_info = self.driver.initial_info
-        state.data = self.driver.data
-        self.undo_stack.append(state)
+        self.undo_stack.append(self.current_state())
         self.redo_stack.clear()
 
     ## Undoable event happened
     #  Save the current state of the program and push it to undo stack
-    #  Clear the redo stack
-    def undoable_event_happened(self):
-        state = InitialState()
-        state.input_image = self.driver.input_image
-        state.cluster_holder = self.driver.cluster_holder
-        state.initial_info = self.driver.initial_info
-        state.data = self.driver.data
-        self.undo_stack.append(state)
+    #  Clear the redo stack and evict the oldest states if the memory budget is exceeded
+    # @param params Parameters of the algorithm that produced the current solution, optional
+    def undoable_event_happened(self, params=None):
+        self.undo_stack.append(self.current_state(params))
         self.redo_stack.clear()
+        self.enforce_memory_budget()
         self.driver.check_buttons()
 
+    ## Memory used by the stored states in bytes
+    #  Data clouds and in-memory distance matrices are counted once, however many states share them,
+    #  and not at all while the current state still uses them
+    def memory_usage(self):
+        usage = 0
+        shared = dict()
+        for state in self.undo_stack + self.redo_stack:
+            usage += len(state.info)
+            shared.update(self.shared_arrays(state))
+            if state.solution is not None:
+                usage += state.solution.nbytes()
+                shared.update(self.shared_arrays(state.solution))
+        if self.undo_stack:
+            for owner in (self.undo_stack[-1], self.undo_stack[-1].solution):
+                for key in self.shared_arrays(owner):
+                    shared.pop(key, None)
+        return usage + sum(shared.values())
+
+    ## Arrays a state or a solution shares with the program, by their ids
+    #  @return Dictionary of id --> size in bytes
+    def shared_arrays(self, owner):
+        arrays = dict()
+        data = getattr(owner, "data", None)
+        if data is not None:
+            arrays[id(data)] = data.nbytes
+        matrix = getattr(getattr(owner, "distances", None), "matrix", None)
+        if matrix is not None and not isinstance(matrix, np.memmap):
+            arrays[id(matrix)] = matrix.nbytes
+        return arrays
+
+    ## Evict the oldest states until the memory budget is met, current state is always kept
+    def enforce_memory_budget(self):
+        while len(self.undo_stack) > 1 and self.memory_usage() > self.memory_budget:
+            evicted = self.undo_stack.pop(0).solution
+            for state in self.undo_stack + self.redo_stack:
+                if state.solution is not None and state.solution.base is evicted:
+                    state.solution.make_keyframe()
 
-## Holds states of final solution
-class UndoRedoFinal(UndoRedo):
-    def __init__(self, driver):
-        super().__init__(driver)
+## Holds states of initial solution
+class UndoRedoInitial(UndoRedo):
+    def __init__(self, driver, memory_budget=256 * 2 ** 20):
+        super().__init__(driver, memory_budget)
 
+    ## Create a state from the current initial solution
+    def current_state(self, params=None):
+        state = InitialState()
+        state.has_image = self.driver.input_image is not None
+        if self.driver.cluster_holder is not None:
+            state.solution = CompactSolution(self.driver.cluster_holder, self.last_solution())
+        state.params = params
+        state.info = compress_info(self.driver.initial_info)
+        state.data = self.driver.data
+        state.distances = self.driver.distances
+        return state
 
-    ## Pop the previous state from undo stack and push it to the redo stack
-    #  Then, set the program's state to top of undo stack
-    def undo(self):
-        x = None
-        try:
-            if len(self.undo_stack) > 1:
-                x = self.undo_stack.pop()
-            else:
-                print('\a')
-        except IndexError:
-            print('\a')
-        finally:
-            if x:
-                self.redo_stack.append(x)
-                y = self.undo_stack[-1]
-                self.driver.output_image = y.output_image
-                self.driver.cluster_holder_final = y.cluster_holder_final
-                self.driver.final_info = y.final_info
-                self.driver.update_io_labels()
-                self.driver.update_info_panels()
-                self.driver.check_buttons()
+    ## Set the initial solution to given state, plot is drawn again
+    def restore(self, state):
+        self.driver.data = state.data
+        self.driver.distances = state.distances
+        self.driver.cluster_holder = state.solution.restore() if state.solution is not None else None
+        self.driver.initial_info = decompress_info(state.info)
+        self.driver.input_image = None
+        if state.has_image:
+            self.driver.replot_input_image()
 
-    ## Pop from the top of redo stack, then push it to the undo stack
-    #  Set the current state of the program to popped state
-    def redo(self):
-        x = None
-        try:
-            x = self.redo_stack.pop()
-        except IndexError:
-            print('\a')
-        finally:
-            if x:
-                self.undo_stack.append(x)
-                self.driver.output_image = x.output_image
-                self.driver.cluster_holder_final = x.cluster_holder_final
-                self.driver.final_info = x.final_info
-                self.driver.update_io_labels()
-                self.driver.update_info_panels()
-                self.driver.check_buttons()
 
-    ## At initilization of the class push initial state with default parameters to undo stack
-    #  And clear redo stack
-    def first_start(self):
-        state = FinalState()
-        state.output_image = self.driver.output_image
-        state.cluster_holder_final = self.driver.output_image
-        state.final_info = self.driver.final_info
-        self.undo_stack.append(state)
-        self.redo_stack.clear()
+## Holds states of final solution
+class UndoRedoFinal(UndoRedo):
+    def __init__(self, driver, memory_budget=256 * 2 ** 20):
+        super().__init__(driver, memory_budget)
 
-    ## Undoable event happened
-    #  Save the current state of the program and push it to undo stack
-    #  Clear the redo stack
-    def undoable_event_happened(self):
+    ## Create a state from the current final solution
+    def current_state(self, params=None):
         state = FinalState()
-        state.output_image = self.driver.output_image
-        state.cluster_holder_final = self.driver.output_image
-        state.final_info = self.driver.final_info
-        self.undo_stack.append(state)
-        self.redo_stack.clear()
-        self.driver.check_buttons()
+        state.has_image = self.driver.output_image is not None
+        if self.driver.cluster_holder_final is not None:
+            state.solution = CompactSolution(self.driver.cluster_holder_final, self.last_solution())
+        state.params = params
+        state.info = compress_info(self.driver.final_info)
+        return state
+
+    ## Set the final solution to given state, plot is drawn again
+    def restore(self, state):
+        self.driver.cluster_holder_final = state.solution.restore() if state.solution is not None else None
+        self.driver.final_info = decompress_info(state.info)
+        self.driver.output_image = None
+        if state.has_image:
+            self.driver.replot_output_image()
 
 ## Driver for MainWindow
 #  This class should be created once(singleton)
@@ -202,15 +283,20 @@ class Driver:
         self.input_image = None
         self.output_image = None
         self.data = None
+        self.distances = None
         self.initial_info = ""
         self.final_info = ""
         self.save_path = None
         self.cluster_holder = None
         self.cluster_holder_final = None
         self.heuristics = None
+        self.worker = None
+        self.hill_climbing_params = HeuristicsParams(time_budget=5.0, patience=20000)
+        self.simulated_annealing_params = HeuristicsParams(time_budget=5.0)
 
-        self.undo_redo_initial = UndoRedoInitial(self)
-        self.undo_redo_final = UndoRedoFinal(self)
+        self.history_memory_budget = 256 * 2 ** 20  # bytes, per undo/redo history
+        self.undo_redo_initial = UndoRedoInitial(self, self.history_memory_budget)
+        self.undo_redo_final = UndoRedoFinal(self, self.history_memory_budget)
         self.check_undo_redo_buttons()
         self.setup_icons()
         self.setup_signal_slots()
@@ -226,14 +312,12 @@ class Driver:
     ## Update the image labels with new plots
     def update_io_labels(self):
         if self.input_image is not None:
-            io.imsave("resources/temp/input.png", self.input_image)
-            self.ui.label_initialSolution.setPixmap(QtGui.QPixmap("resources/temp/input.png"))
+            self.ui.label_initialSolution.setPixmap(self.input_image)
         else:
             self.ui.label_initialSolution.clear()
 
         if self.output_image is not None:
-            io.imsave("resources/temp/output.png", self.output_image)
-            self.ui.label_finalSolution.setPixmap(QtGui.QPixmap("resources/temp/output.png"))
+            self.ui.label_finalSolution.setPixmap(self.output_image)
         else:
             self.ui.label_finalSolution.clear()
 
@@ -277,21 +361,131 @@ class Driver:
         self.ui.actionHierarchical_Clustering.triggered.connect(self.open_hierarchical)
         self.ui.actionDBSCAN.triggered.connect(self.open_dbscan)
         self.ui.actionHill_Climbing.triggered.connect(self.hill_climbing)
-        self.ui.actionSimulated_Anneling.triggered.connect(self.say_hello)
+        self.ui.actionSimulated_Anneling.triggered.connect(self.simulated_annealing)
         self.ui.actionExport_As_Initial_Solution.triggered.connect(self.export_as_initial_solution)
         self.ui.actionExport_As_Final_Solution.triggered.connect(self.export_as_final_solution)
+        self.ui.actionCancel.triggered.connect(self.cancel)
 
     ## Apply hil climbing optimization algorithm to refine initial solution
     def hill_climbing(self):
+        self.run_heuristics(HillClimbing(self.cluster_holder.copy(), **asdict(self.hill_climbing_params)))
+
+    ## Apply simulated annealing optimization algorithm to refine initial solution
+    def simulated_annealing(self):
+        self.run_heuristics(SimulatedAnnealing(self.cluster_holder.copy(), cooling="geometric", **asdict(self.simulated_annealing_params)))
+
+    ## Check if a worker is running
+    def is_busy(self):
+        return self.worker is not None
+
+    ## Start a worker, only one worker runs at a time
+    #  Buttons are disabled until the worker is finished
+    def start_worker(self, worker):
+        self.worker = worker
+        worker.signals.error.connect(self.worker_failed)
+        self.check_buttons()
+        worker.start()
+
+    ## Worker is finished or failed, enable the buttons again
+    def release_worker(self):
+        self.worker = None
+        self.check_buttons()
+
+    ## Build the distance oracle of the data cloud on a worker thread
+    #  Distance matrix for small data clouds, straight-line distances above distances.MAX_MATRIX_NODES nodes.
+    #  Algorithms wait for it, if it is cancelled they compute straight-line distances on demand.
+    def run_distances(self):
+        self.print_info("Building distances...")
+        worker = Worker(default_distances, self.data)
+        worker.signals.finished.connect(self.distances_finished)
+        self.start_worker(worker)
+
+    ## Use the built distances, called on the GUI thread
+    #  States of the history holding the same data cloud get the distances too
+    def distances_finished(self, distances):
+        cancelled = self.worker.cancelled
+        data = self.worker.args[0]
+        self.release_worker()
+        if cancelled:
+            self.print_info("Building distances is cancelled, straight-line distances are computed on demand")
+            return
+        if self.data is data:
+            self.distances = distances
+        for state in self.undo_redo_initial.undo_stack + self.undo_redo_initial.redo_stack:
+            if state.data is data:
+                state.distances = distances
+        self.undo_redo_initial.enforce_memory_budget()
+        self.print_info("Distances are ready")
+
+    ## Run clustering algorithm on a worker thread, the result is shown when it is finished
+    # @param clustering_class Subclass of Clustering
+    # @param params Parameters dataclass of the clustering algorithm
+    def run_clustering(self, clustering_class, params):
+        if self.is_busy():
+            print('\a')
+            return
+        self.print_info("Running clustering...")
+        worker = Worker(clustering_class, self.data, params, distances=self.distances)
+        worker.signals.finished.connect(self.clustering_finished)
+        self.start_worker(worker)
+
+    ## Show the result of clustering, called on the GUI thread
+    def clustering_finished(self, operation):
+        cancelled = self.worker.cancelled
+        self.release_worker()
+        if cancelled:
+            self.print_info("Clustering is cancelled")
+            return
+        operation.show(self.ui, self)
+        self.cluster_holder = operation.get_cluster_holder()
+        self.check_heuristics_buttons()  # do not delete this line
+        self.cluster_holder.rewrite_info()
+        self.print_info(self.cluster_holder.info)
+        self.undo_redo_initial.undoable_event_happened(operation.params)
+
+    ## Run heuristics on a worker thread, progress is streamed to final solution info panel
+    # @param heuristics Heuristics object, not run yet
+    def run_heuristics(self, heuristics):
+        if self.is_busy():
+            print('\a')
+            return
+        self.clear_heuristics_info()
+        self.print_heuristics_info("Running heuristics...")
+        self.heuristics = heuristics
+        worker = Worker(heuristics.run)
+        worker.cancel_callback = heuristics.stop
+        heuristics.set_progress_callback(worker.report_progress, interval=0.5)
+        worker.signals.progress.connect(self.heuristics_progress)
+        worker.signals.finished.connect(self.heuristics_finished)
+        self.start_worker(worker)
+
+    ## Print progress of running heuristics
+    def heuristics_progress(self, iteration, score):
+        self.print_heuristics_info(f"Iteration({iteration}) - best score --> {score:.3f}")
+
+    ## Show the result of heuristics, called on the GUI thread
+    #  A cancelled heuristics run still returns the best solution found until cancellation
+    def heuristics_finished(self, heuristics):
+        self.release_worker()
         self.clear_heuristics_info()
-        self.heuristics = HillClimbing(deepcopy(self.cluster_holder), n_iterations=1000)
-        self.cluster_holder_final = self.heuristics.get_final_solution()
+        self.cluster_holder_final = heuristics.get_final_solution()
         self.print_heuristics_info("### DATA ###")
         self.print_heuristics_info(self.data)
-        self.print_heuristics_info(self.heuristics.info)
+        self.print_heuristics_info(heuristics.info)
         self.print_heuristics_info(self.cluster_holder_final.info)
-        self.plot_final_solution()
-        self.undo_redo_final.undoable_event_happened()
+        self.update_output_image(heuristics.plot_clustering())
+        self.undo_redo_final.undoable_event_happened((type(heuristics).__name__, heuristics.describe_budget()))
+
+    ## Algorithm raised an exception on the worker thread
+    def worker_failed(self, error):
+        self.release_worker()
+        QtWidgets.QMessageBox.warning(QtWidgets.QDialog(), 'Warning', f"Operation failed.\n{error}")
+
+    ## Cancel running operation
+    #  Heuristics stop at the next iteration and keep their best solution, clustering result is discarded
+    def cancel(self):
+        if self.is_busy():
+            self.worker.cancel()
 
     ## Save initial solution info (to *.txt file)
     def save_initial_solution(self):
@@ -332,8 +526,7 @@ class Driver:
         if self.input_image is not None:
             self.save_path, _ = QtWidgets.QFileDialog.getSaveFileName(filter="Image files (*.jpg)")
             if len(self.save_path) != 0:
-                output = self.input_image[:, :, :-1] # RGBA to RGB before saving (JPG DOES NOT SUPPORT RGBA)
-                io.imsave(self.save_path, output)
+                self.input_image.save(self.save_path, "JPG")
         else:
             QtWidgets.QMessageBox.warning(QtWidgets.QDialog(), 'Warning - Output is empty',
                                           'You must process input image before saving.')
@@ -343,28 +536,30 @@ class Driver:
         if self.output_image is not None:
             self.save_path, _ = QtWidgets.QFileDialog.getSaveFileName(filter="Image files (*.jpg)")
             if len(self.save_path) != 0:
-                output = self.output_image[:, :, :-1] # RGBA to RGB before saving (JPG DOES NOT SUPPORT RGBA)
-                io.imsave(self.save_path, output)
+                self.output_image.save(self.save_path, "JPG")
         else:
             QtWidgets.QMessageBox.warning(QtWidgets.QDialog(), 'Warning - Output is empty',
                                           'You must process input image before saving.')
-    ## Open input data (point cloud) (*.txt)
+    ## Open input data (point cloud) (*.txt, *.csv, *.npy, *.bin, *.dat)
     def open_data(self):
         try:
             self.clear_info()
             self.clear_heuristics_info()
             self.print_info("Opening data...")
-            fname, _ = QtWidgets.QFileDialog.getOpenFileName(filter="Text files (*.txt)")
-            self.data = np.loadtxt(fname)
+            fname, _ = QtWidgets.QFileDialog.getOpenFileName(filter="Data files (*.txt *.csv *.npy *.bin *.dat)")
+            self.data = load_data(fname)
+            self.distances = None
+            self.cluster_holder = None
 
             self.print_info("### DATA ###")
             self.print_info(self.data)
 
             self.plot_initial_solution()
             self.undo_redo_initial.undoable_event_happened()
+            self.run_distances()
 
 
-        except FileNotFoundError:
+        except (FileNotFoundError, ValueError):
             QtWidgets.QMessageBox.warning(QtWidgets.QDialog(), 'Warning',
                                           "Couldn't open file.")
 
@@ -390,21 +585,9 @@ class Driver:
 
     ## When new data cloud is opened, plot the points with black dots
     def plot_initial_solution(self):
-        plt.clf()
-        for i, (X,Y) in enumerate(self.data):
-            plt.scatter(X, Y, color='black')
-            plt.annotate(i, (X, Y))
-        plt.savefig("resources/temp/input.png")
-        self.input_image = io.imread("resources/temp/input.png")
-        self.ui.label_initialSolution.setPixmap(QtGui.QPixmap("resources/temp/input.png"))
-
-    ## Update final solution plot
-    def plot_final_solution(self):
-        self.output_image = io.imread("resources/temp/output.png")
-        self.ui.label_finalSolution.setPixmap(QtGui.QPixmap("resources/temp/output.png"))
-
-    def say_hello(self):
-        print("HELLO THERE !")
+        figure = new_figure()
+        plot_data(self.data, figure.add_subplot())
+        self.update_input_image(figure)
 
     ## Open K-Means clustering window and wait for user to enter parameters
     def open_k_means(self):
@@ -432,12 +615,8 @@ class Driver:
             return -1
 
         algorithm = self.kmeans_ui.algorithm.currentText()
-        operation = ClusterKMeans(self.data, KMeansParams(n_clusters, init, max_iter, algorithm), self.ui, self)
-        self.cluster_holder = operation.get_cluster_holder()
-        self.check_heuristics_buttons()  # do not delete this line
         self.kmeans_widget.hide()
-        self.print_info(self.cluster_holder.info)
-        self.undo_redo_initial.undoable_event_happened()
+        self.run_clustering(ClusterKMeans, KMeansParams(n_clusters, init, max_iter, algorithm))
 
     ## Open affinity propagation clustering window and wait for user to enter parameters
     def open_affinity(self):
@@ -482,12 +661,8 @@ class Driver:
                                           "Enter a valid input for random_state. --> integer or None")
             return -1
 
-        operation = ClusterAffinity(self.data, AffinityParams(damping, max_iter, convergence_iter, affinity, random_state), self.ui, self)
-        self.cluster_holder = operation.get_cluster_holder()
-        self.check_heuristics_buttons() # do not delete this line
         self.affinity_widget.hide()
-        self.print_info(self.cluster_holder.info)
-        self.undo_redo_initial.undoable_event_happened()
+        self.run_clustering(ClusterAffinity, AffinityParams(damping, max_iter, convergence_iter, affinity, random_state))
 
     ## Open dbscan clustering window and wait for user to enter parameters
     def open_dbscan(self):
@@ -523,12 +698,8 @@ class Driver:
             return -1
 
 
-        operation = ClusterDBSCAN(self.data, DBSCANParams(eps, min_samples, algorithm, p), self.ui, self)
-        self.cluster_holder = operation.get_cluster_holder()
-        self.check_heuristics_buttons()  # do not delete this line
         self.dbscan_widget.hide()
-        self.print_info(self.cluster_holder.info)
-        self.undo_redo_initial.undoable_event_happened()
+        self.run_clustering(ClusterDBSCAN, DBSCANParams(eps, min_samples, algorithm, p))
 
     ## Open hierarchical clustering window and wait for user to enter parameters
     def open_hierarchical(self):
@@ -548,12 +719,8 @@ class Driver:
 
         affinity = self.hierarchical_ui.affinity.currentText()
         linkage = self.hierarchical_ui.linkage.currentText()
-        operation = ClusterHierarchical(self.data, HierarchicalParams(n_clusters, affinity, linkage), self.ui, self)
-        self.cluster_holder = operation.get_cluster_holder()
-        self.check_heuristics_buttons()  # do not delete this line
         self.hierarchical_widget.hide()
-        self.print_info(self.cluster_holder.info)
-        self.undo_redo_initial.undoable_event_happened()
+        self.run_clustering(ClusterHierarchical, HierarchicalParams(n_clusters, affinity, linkage))
 
     ## Open meanshift clustering window and wait for user to enter parameters
     def open_meanshift(self):
@@ -586,12 +753,8 @@ class Driver:
             cluster_all = True
         else:
             cluster_all = False
-        operation = ClusterMeanShift(self.data, MeanShiftParams(bandwidth, max_iter, cluster_all), self.ui, self)
-        self.cluster_holder = operation.get_cluster_holder()
-        self.check_heuristics_buttons()  # do not delete this line
         self.meanshift_widget.hide()
-        self.print_info(self.cluster_holder.info)
-        self.undo_redo_initial.undoable_event_happened()
+        self.run_clustering(ClusterMeanShift, MeanShiftParams(bandwidth, max_iter, cluster_all))
 
     ## Open spectral clustering window and wait for user to enter parameters
     def open_spectral(self):
@@ -628,12 +791,22 @@ class Driver:
             return -1
 
         assign_labels = self.spectral_ui.assign_labels.currentText()
-        operation = ClusterSpectral(self.data, SpectralParams(n_clusters, n_components, n_init, assign_labels), self.ui, self)
-        self.cluster_holder = operation.get_cluster_holder()
-        self.check_heuristics_buttons()  # do not delete this line
+        affinity = self.spectral_ui.affinity.currentText()
+
+        try:
+            data = self.spectral_ui.n_neighbors.text()
+            n_neighbors = int(data)
+        except ValueError:
+            QtWidgets.QMessageBox.warning(QtWidgets.QDialog(), 'Warning',
+                                          "Enter a valid input for n_neighbors. --> integer")
+            return -1
+
+        eigen_solver = self.spectral_ui.eigen_solver.currentText()
+        if eigen_solver == 'None':
+            eigen_solver = None
+
         self.spectral_widget.hide()
-        self.print_info(self.cluster_holder.info)
-        self.undo_redo_initial.undoable_event_happened()
+        self.run_clustering(ClusterSpectral, SpectralParams(n_clusters, n_components, n_init, assign_labels, affinity, n_neighbors, eigen_solver))
 
     ## Invoke enable disable check of all buttons
     def check_buttons(self):
@@ -642,17 +815,25 @@ class Driver:
         self.check_clustering_buttons()
         self.check_save_export_as_buttons()
         self.check_heuristics_buttons()
+        self.check_worker_buttons()
+
+    ## Enable disable check of buttons depending on a running worker
+    #  While an algorithm is running it can be cancelled, but new data can not be opened
+    def check_worker_buttons(self):
+        self.ui.actionCancel.setEnabled(self.is_busy())
+        self.ui.actionOpen_Data.setEnabled(not self.is_busy())
+        self.ui.toolButton_openData.setEnabled(not self.is_busy())
 
     ## Enable disable check of clear buttons
     def check_clear_buttons(self):
-        if self.input_image is not None:
+        if self.input_image is not None and not self.is_busy():
             self.ui.toolButton_clearInitialSolution.setEnabled(True)
             self.ui.actionClear_Initial_Solution.setEnabled(True)
         else:
             self.ui.toolButton_clearInitialSolution.setEnabled(False)
             self.ui.actionClear_Initial_Solution.setEnabled(False)
 
-        if self.output_image is not None:
+        if self.output_image is not None and not self.is_busy():
             self.ui.toolButton_clearFinalSolution.setEnabled(True)
             self.ui.actionClear_Final_Solution.setEnabled(True)
         else:
@@ -685,7 +866,7 @@ class Driver:
 
     ## Enable disable check of heuristics buttons
     def check_heuristics_buttons(self):
-        if self.input_image is not None and self.cluster_holder is not None:
+        if self.input_image is not None and self.cluster_holder is not None and not self.is_busy():
             self.ui.toolButton_hillClimbing.setEnabled(True)
             self.ui.toolButton_simulatedAnneling.setEnabled(True)
             self.ui.actionHill_Climbing.setEnabled(True)
@@ -698,7 +879,7 @@ class Driver:
 
     ## Enable disable check of clustering buttons
     def check_clustering_buttons(self):
-        if self.input_image is not None:
+        if self.input_image is not None and not self.is_busy():
             self.ui.actionK_Means.setEnabled(True)
             self.ui.actionAffinity_Propagation.setEnabled(True)
             self.ui.actionMean_shift.setEnabled(True)
@@ -729,43 +910,60 @@ class Driver:
 
     ## Enable disable check of undo redo buttons
     def check_undo_redo_buttons(self):
-        if len(self.undo_redo_initial.undo_stack) > 1:
+        if len(self.undo_redo_initial.undo_stack) > 1 and not self.is_busy():
             self.ui.toolButton_undoInitialSolution.setEnabled(True)
             self.ui.actionUndo_Initial_Solution.setEnabled(True)
         else:
             self.ui.toolButton_undoInitialSolution.setEnabled(False)
             self.ui.actionUndo_Initial_Solution.setEnabled(False)
 
-        if len(self.undo_redo_initial.redo_stack) > 0:
+        if len(self.undo_redo_initial.redo_stack) > 0 and not self.is_busy():
             self.ui.toolButton_redoInitialSolution.setEnabled(True)
             self.ui.actionRedo_Initial_Solution.setEnabled(True)
         else:
             self.ui.toolButton_redoInitialSolution.setEnabled(False)
             self.ui.actionRedo_Initial_Solution.setEnabled(False)
 
-        if len(self.undo_redo_final.undo_stack) > 1:
+        if len(self.undo_redo_final.undo_stack) > 1 and not self.is_busy():
             self.ui.toolButton_undoFinalSolution.setEnabled(True)
             self.ui.actionUndo_Final_Solution.setEnabled(True)
         else:
             self.ui.toolButton_undoFinalSolution.setEnabled(False)
             self.ui.actionUndo_Final_Solution.setEnabled(False)
 
-        if len(self.undo_redo_final.redo_stack) > 0:
+        if len(self.undo_redo_final.redo_stack) > 0 and not self.is_busy():
             self.ui.toolButton_redoFinalSolution.setEnabled(True)
             self.ui.actionRedo_Final_Solution.setEnabled(True)
         else:
             self.ui.toolButton_redoFinalSolution.setEnabled(False)
             self.ui.actionRedo_Final_Solution.setEnabled(False)
 
+    ## Draw initial solution plot again from the current data cloud and initial solution
+    def replot_input_image(self):
+        figure = new_figure()
+        if self.cluster_holder is not None:
+            plot_cluster_holder(self.cluster_holder, figure.add_subplot())
+        else:
+            plot_data(self.data, figure.add_subplot())
+        self.input_image = figure_to_pixmap(figure)
+
+    ## Draw final solution plot again from the current final solution
+    def replot_output_image(self):
+        figure = new_figure()
+        plot_cluster_holder(self.cluster_holder_final, figure.add_subplot())
+        self.output_image = figure_to_pixmap(figure)
+
     ## Update initial solution plot
-    def update_input_image(self):
-        self.input_image = io.imread("resources/temp/input.png")
-        self.ui.label_initialSolution.setPixmap(QtGui.QPixmap("resources/temp/input.png"))
+    # @param figure Figure of the initial solution
+    def update_input_image(self, figure):
+        self.input_image = figure_to_pixmap(figure)
+        self.ui.label_initialSolution.setPixmap(self.input_image)
 
     ## Update final solution plot
-    def update_output_image(self):
-        self.output = io.imread("resources/temp/output.png")
-        self.ui.label_finalSolution.setPixmap(QtGui.QPixmap("resources/temp/output.png"))
+    # @param figure Figure of the final solution
+    def update_output_image(self, figure):
+        self.output_image = figure_to_pixmap(figure)
+        self.ui.label_finalSolution.setPixmap(self.output_image)
 
     ## At the initialization of Driver class create the parameter asking widgets
     def create_widgets(self):
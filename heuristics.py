@@ -1,134 +1,606 @@
-from matplotlib import pyplot as plt
-from numpy.random import rand, randn, randint
 from typing import Protocol
-from utils import ClusterHolder
-from copy import deepcopy
+from utils import ClusterHolder, DeltaObjective
+from onecenter import one_center
+from plotting import new_figure, plot_cluster_holder
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 import numpy as np
+import math
+import time
+import os
 
 ## Base class for Heuristics
+#  Moves modify the ClusterHolder in place and return undo records, so a rejected candidate is reverted
+#  without copying the whole solution. An undo record is one of
+#  ("hub", cluster index, previous hub) or ("node", node, source cluster index, target cluster index)
+#
+#  A run is limited by an iteration budget, a wall-clock budget and/or a patience (number of iterations without
+#  a new best solution), whichever is reached first. Best solution found so far can be read at any moment during
+#  the run with get_best_solution and get_best_score.
 class Heuristics:
-	def __init__(self, ch: ClusterHolder, n_iterations: int):
+	## Constructor
+	# @param ch Initial solution
+	# @param n_iterations Number of iterations, None for no limit
+	# @param time_budget Maximum running time in seconds, None for no limit
+	# @param patience Stop after this many iterations without a new best solution, None for no limit
+	# @param seed Seed of the random number generator of the moves
+	def __init__(self, ch: ClusterHolder, n_iterations=None, time_budget=None, patience=None, seed=None):
+		if n_iterations is None and time_budget is None and patience is None:
+			raise ValueError("At least one of n_iterations, time_budget and patience must be given")
 		self.info = ""
-		self.colorspace = ["purple", "cyan", "green", "orange", "brown", "gray", "magenta", "blue", "yellow", "pink"]
-		self.ch_origin = deepcopy(ch)
+		self.rng = np.random.default_rng(seed)
 		self.ch = ch
 		self.n_clusters = self.ch.n_clusters  # number of clusters
 		self.n_iterations = n_iterations
-		self.initial_score = max(self.ch.objective_function)
+		self.time_budget = time_budget
+		self.patience = patience
+		self.objective = DeltaObjective(self.ch)  # incremental objective, moves notify it about the clusters they touch
+		self.initial_score = self.objective.score()
+		self.best_score = self.initial_score
+		self.best_solution = self.ch.get_solution()  # labels and hubs of the best solution found so far
+		self.best_iteration = 0
+		self.iteration = 0
+		self.start_time = None
+		self.stop_requested = False
+		self.progress_callback = None
+		self.progress_interval = None
+		self.last_progress_time = None
+
+	## Run the heuristic until its budget is over
+	#  Current solution is set to the best solution at the end
+	#  @return self
+	def run(self):
+		self.start_time = time.perf_counter()
 		self.evaluate()
-		self.plot_clustering()
+		self.ch.set_solution(*self.best_solution)
+		return self
 
 	## When operation is done, by calling this function we get new clusters
 	#  @return Manipulated (optimized) clusters. --> ClusterHolder object.
 	def get_final_solution(self):
-		self.ch_origin.rewrite_info()
-		return self.ch_origin
+		self.ch.rewrite_info()
+		return self.ch
+
+	## Best solution found so far, safe to call while the heuristic is running
+	#  @return New ClusterHolder object built from the best labels and hubs
+	def get_best_solution(self):
+		labels, hubs = self.best_solution
+		return ClusterHolder(self.ch.data, labels, alpha=self.ch.alpha, distances=self.ch.distances, hubs=hubs)
+
+	## Score of the best solution found so far
+	def get_best_score(self):
+		return self.best_score
+
+	## Request the running heuristic to stop, can be called from another thread
+	#  Run ends before the next iteration, best solution found so far is kept
+	def stop(self):
+		self.stop_requested = True
+
+	## Set a function to be called periodically with (iteration, best score) while running
+	# @param callback Function to call, it is called from the thread running the heuristic
+	# @param interval Minimum time between two calls in seconds
+	def set_progress_callback(self, callback, interval=0.25):
+		self.progress_callback = callback
+		self.progress_interval = interval
 
 	## Override this function
 	def evaluate(self): # override this function
 		...
 
+	## Check the budgets before an iteration
+	#  @param iteration Index of the next iteration
+	#  @return True if the run can continue
+	def budget_left(self, iteration):
+		self.iteration = iteration
+		if self.progress_callback is not None:
+			self.report_progress(iteration)
+		if self.stop_requested:
+			self.info += f"Stopped by user at iteration({iteration})\n"
+			return False
+		if self.n_iterations is not None and iteration >= self.n_iterations:
+			return False
+		if self.patience is not None and iteration - self.best_iteration >= self.patience:
+			self.info += f"No improvement for {self.patience} iterations, stopped at iteration({iteration})\n"
+			return False
+		if self.time_budget is not None and self.elapsed_time() >= self.time_budget:
+			self.info += f"Time budget is over at iteration({iteration})\n"
+			return False
+		return True
+
+	## Call the progress callback if progress_interval passed since the last call
+	def report_progress(self, iteration):
+		now = time.perf_counter()
+		if self.last_progress_time is None or now - self.last_progress_time >= self.progress_interval:
+			self.last_progress_time = now
+			self.progress_callback(iteration, self.best_score)
+
+	## Fraction of the iteration or time budget used, the larger one
+	#  0 when the run is limited only by patience
+	def progress(self, iteration):
+		progress = 0.0
+		if self.n_iterations is not None:
+			progress = iteration / self.n_iterations
+		if self.time_budget is not None:
+			progress = max(progress, self.elapsed_time() / self.time_budget)
+		return min(progress, 1.0)
+
+	## Seconds since the start of the run
+	def elapsed_time(self):
+		return time.perf_counter() - self.start_time
+
+	## Describe the budget of the run for info
+	def describe_budget(self):
+		budget = list()
+		if self.n_iterations is not None:
+			budget.append(f"{self.n_iterations} iterations")
+		if self.time_budget is not None:
+			budget.append(f"{self.time_budget} seconds")
+		if self.patience is not None:
+			budget.append(f"patience of {self.patience} iterations")
+		return ", ".join(budget)
+
+	## Store current solution as the best solution
+	# @param score Objective function score of the current solution
+	def save_best(self, score):
+		self.best_solution = self.ch.get_solution()
+		self.best_score = score
+		self.best_iteration = self.iteration
+
+	## Revert the moves in reverse order of their application
+	#  @param moves Undo records returned by the moves
+	def undo(self, moves):
+		for move in reversed(moves):
+			if move[0] == "hub":
+				_, index, hub = move
+				self.ch.clusters[index].central_node_index = hub
+				self.objective.hub_changed(index)
+			else:
+				_, node, source, target = move
+				self.move_node(node, self.ch.clusters[target], self.ch.clusters[source])
+
 	## Change the location of the hub in a randomly chosen cluster with a randomly chosen node in the same cluster
+	#  @return Undo records of the move
 	def relocate_hub(self):
 		rand_cl = self.rand_cluster()
-		rand_cl.central_node_index = randint(len(rand_cl.points))
-		rand_cl.central_node = rand_cl.points[rand_cl.central_node_index]
+		move = ("hub", rand_cl.cluster_index, rand_cl.central_node_index)
+		rand_cl.central_node_index = self.rand_node(rand_cl)
+		self.objective.hub_changed(rand_cl.cluster_index)
+		return [move]
 
 	## From a randomly chosen cluster, change the allocation of non-hub node to a different randomly chosen cluster.
 	#  If the randomly chosen cluster consists of only one node, we do not allow this operation.
+	#  @return Undo records of the move
 	def reallocate_node(self):  
 		rand_cl = self.rand_cluster()
 		rand_cl2 = self.rand_cluster()
-		r_node_index, r_node = self.rand_node(rand_cl)
+		r_node = self.rand_node(rand_cl)
 		if rand_cl != rand_cl2:
-			if r_node_index != rand_cl.central_node_index:
-				rand_cl.points = np.delete(rand_cl.points, r_node_index,0)
-				if rand_cl.central_node_index > r_node_index:
-					rand_cl.central_node_index -= 1
-				rand_cl2.points = np.append(rand_cl2.points, [r_node], axis=0)
-		rand_cl.central_node = rand_cl.points[rand_cl.central_node_index]
-
+			if not rand_cl.is_central_node(r_node):
+				return [self.move_node(r_node, rand_cl, rand_cl2)]
+		return []
 
 	## Swap the allocations of two randomly chosen non-hub nodes from different clusters.
+	#  @return Undo records of the move
 	def swap_nodes(self):
 		rand_cl = self.rand_cluster()
-		r_node_index, r_node = self.rand_node(rand_cl)
+		r_node = self.rand_node(rand_cl)
 		rand_cl2 = self.rand_cluster()
-		r_node2_index, r_node2 = self.rand_node(rand_cl2)
+		r_node2 = self.rand_node(rand_cl2)
 		if rand_cl != rand_cl2:
-			if r_node_index != rand_cl.central_node_index and r_node2_index != rand_cl2.central_node_index:
-				rand_cl.points = np.delete(rand_cl.points, r_node_index, 0)
-				if rand_cl.central_node_index > r_node_index:
-					rand_cl.central_node_index -= 1
-				rand_cl2.points = np.delete(rand_cl2.points, r_node2_index, 0)
-				if rand_cl2.central_node_index > r_node2_index:
-					rand_cl2.central_node_index -= 1
-				rand_cl.points = np.append(rand_cl.points, [r_node2], axis=0)
-				rand_cl2.points = np.append(rand_cl2.points, [r_node], axis=0)
-		rand_cl.central_node = rand_cl.points[rand_cl.central_node_index]
-		rand_cl2.central_node = rand_cl2.points[rand_cl2.central_node_index]
+			if not rand_cl.is_central_node(r_node) and not rand_cl2.is_central_node(r_node2):
+				return [self.move_node(r_node, rand_cl, rand_cl2), self.move_node(r_node2, rand_cl2, rand_cl)]
+		return []
+
+	## Relocate the hub of a cluster to the node that gives the lowest objective
+	#  Objective of a candidate hub is the largest of its pair terms with the other hubs, twice the largest radius
+	#  and the pair terms not involving the cluster. Pair terms with the other hubs are evaluated for all nodes
+	#  of the cluster at once, the radii of the candidates only as far as the bounded search of one_center needs them.
+	#  @param cluster Cluster whose hub is relocated, a random cluster when None
+	#  @return Undo records of the move, empty if the current hub is already the best
+	def best_hub_relocation(self, cluster=None):
+		if cluster is None:
+			cluster = self.rand_cluster()
+		index = cluster.cluster_index
+		others = np.arange(self.n_clusters) != index
+		other_radii = self.objective.radii[others]
+		fixed = max(self.objective.pair_terms[np.ix_(others, others)].max(initial=-np.inf), 2 * other_radii.max(initial=-np.inf))
+		hub_terms = self.ch.alpha * np.asarray(self.ch.distances.pairwise(cluster.nodes, self.objective.hubs[others])) + other_radii
+		hub_terms = hub_terms.max(axis=1, initial=-np.inf)
+
+		def cost(candidates, radii):  # objective with the candidates as hub, given their radii
+			return np.maximum(np.maximum(radii + hub_terms[candidates], 2 * radii), fixed)
+
+		return self.set_hub(cluster, one_center(cluster.nodes, self.ch.distances, cost)[0])
+
+	## Relocate the hub of a cluster to its discrete 1-center, the node minimizing the radius of the cluster
+	#  Deterministic and cheaper than best_hub_relocation, but hub-to-hub distances are not taken into account
+	#  @param cluster Cluster whose hub is relocated, a random cluster when None
+	#  @return Undo records of the move, empty if the current hub is already the 1-center
+	def one_center_relocation(self, cluster=None):
+		if cluster is None:
+			cluster = self.rand_cluster()
+		return self.set_hub(cluster, one_center(cluster.nodes, self.ch.distances)[0])
+
+	## Change the hub of a cluster and update the objective accordingly
+	#  @return Undo records of the move, empty if the hub does not change
+	def set_hub(self, cluster, hub):
+		if hub == cluster.central_node_index:
+			return []
+		move = ("hub", cluster.cluster_index, cluster.central_node_index)
+		cluster.central_node_index = hub
+		self.objective.hub_changed(cluster.cluster_index)
+		return [move]
+
+	## Reallocate a non-hub node to the cluster that gives the lowest objective
+	#  Every other cluster is evaluated as target in one pass. Only the radii of the source and the target change,
+	#  so the objective of target t is the largest of the pair terms of t, the pair terms not involving t
+	#  (from the two largest terms of every row) and twice the largest radius.
+	#  @param node Index of the node in the data cloud, the farthest node from the hub of a random cluster when None
+	#  @return Undo records of the move, empty if the node is a hub or there is one cluster
+	def best_node_reallocation(self, node=None):
+		if node is None:
+			cluster = self.rand_cluster()
+			node = int(cluster.nodes[np.argmax(self.ch.distances.between(cluster.central_node_index, cluster.nodes))])
+		source = int(self.ch.labels[node])
+		source_cluster = self.ch.clusters[source]
+		if self.n_clusters < 2 or source_cluster.is_central_node(node):
+			return []
+
+		objective = self.objective
+		radii = objective.radii.copy()
+		if objective.distance_to_hub(node, source) >= radii[source]:
+			remaining = source_cluster.nodes[source_cluster.nodes != node]
+			radii[source] = np.max(self.ch.distances.between(source_cluster.central_node_index, remaining))
+		target_radii = np.maximum(radii, self.ch.distances.between(node, objective.hubs))  # radius of every cluster receiving the node
+
+		targets = np.arange(self.n_clusters)
+		pair_terms = radii[:, np.newaxis] + self.ch.alpha * objective.hub_distances + radii[np.newaxis, :]
+		np.fill_diagonal(pair_terms, -np.inf)
+		order = np.argsort(pair_terms, axis=1)
+		first, second = order[:, -1], order[:, -2]
+		# largest pair term of row i without column t, rows and columns of t excluded
+		untouched = np.where(first[np.newaxis, :] == targets[:, np.newaxis], pair_terms[targets, second], pair_terms[targets, first])
+		np.fill_diagonal(untouched, -np.inf)
+		target_terms = target_radii[:, np.newaxis] + self.ch.alpha * objective.hub_distances + radii[np.newaxis, :]
+		np.fill_diagonal(target_terms, -np.inf)
+		# largest radius without the target
+		largest = np.argsort(radii)[::-1][:2]
+		other_radii = np.where(targets == largest[0], radii[largest[1]], radii[largest[0]])
+
+		scores = np.maximum.reduce([untouched.max(axis=1), target_terms.max(axis=1), 2 * target_radii, 2 * other_radii])
+		scores[source] = np.inf
+		return [self.move_node(node, source_cluster, self.ch.clusters[int(np.argmin(scores))])]
+
+	## Move a node between two clusters and update the objective accordingly
+	#  @return Undo record of the move
+	def move_node(self, node, source, target):
+		self.ch.move_node(node, target.cluster_index)
+		self.objective.node_moved(node, source.cluster_index, target.cluster_index)
+		return ("node", node, source.cluster_index, target.cluster_index)
 
 	## Pick a random cluster and return it
 	def rand_cluster(self):
-		return self.ch.clusters[randint(self.n_clusters)]
+		return self.ch.clusters[self.rng.integers(self.n_clusters)]
 
-	## Pick a random node in given cluster and return it and its index
+	## Pick a random node in given cluster and return its index in the data cloud
 	def rand_node(self, cluster):
-		index = randint(len(cluster.points))
-		return index, cluster.points[index]
+		return int(cluster.nodes[self.rng.integers(len(cluster.nodes))])
 
 	## Plot final solution that improved from initial solution
+	#  @return Figure of the plot
 	def plot_clustering(self):
-		plt.clf()
-		for index, cluster in enumerate(self.ch_origin.clusters):
-			plt.scatter(cluster.center_point[0], cluster.center_point[1], color="red", marker="x", s=130)
-			for i, (X,Y) in enumerate(cluster.points):
-				plt.scatter(X, Y, color=self.colorspace[cluster.cluster_index % len(self.colorspace)])
-				plt.annotate(self.ch.get_data_index_by_point([X,Y]), (X,Y))
-			plt.scatter(cluster.central_node[0], cluster.central_node[1], color='red')
-
-		plt.savefig("resources/temp/output.png")
+		figure = new_figure()
+		plot_cluster_holder(self.ch, figure.add_subplot())
+		return figure
 
 
 ## HillClimbing optimization algorithm
 class HillClimbing(Heuristics):
 	## Constructor
 	# @param n_iterations Number of iterations.
-	def __init__(self, ch, n_iterations):
-		super().__init__(ch, n_iterations)
+	def __init__(self, ch, n_iterations=None, time_budget=None, patience=None, seed=None):
+		super().__init__(ch, n_iterations, time_budget, patience, seed)
 
 	## Run --> hill climbing
 	def evaluate(self):
-		self.info += f"\nRunning hill-climbing algorithm for {self.n_iterations} times\n"
+		self.info += f"\nRunning hill-climbing algorithm ({self.describe_budget()})\n"
 		solution_eval = self.initial_score
 		self.info += f"Initial score is {self.initial_score}\n\n"
-		for i in range(self.n_iterations):
+		i = 0
+		while self.budget_left(i):
 			# take a step
-			self.relocate_hub()  # --> do some modifications and find new solution candidate
-			self.reallocate_node()
-			self.swap_nodes()
+			moves = self.relocate_hub()  # --> do some modifications and find new solution candidate
+			moves += self.reallocate_node()
+			moves += self.swap_nodes()
 			# evaluate candidate point
-			candidate_eval = self.ch.calculate_objective_function()  # --> get objective function score from it
+			candidate_eval = self.objective.score()  # --> get objective function score from it (only the touched clusters are recomputed)
 			# check if we should keep the new point
 			if candidate_eval < solution_eval:  # --> if candidate_score is lower than initial score (we will use greater than)
 				# store the new point
-				self.ch_origin = deepcopy(self.ch)
+				self.save_best(candidate_eval)
 				solution_eval = candidate_eval
 				# report progress
 				self.info += f"Iteration({i}) - New solution found, new score --> {solution_eval:.3f}\n"  # --> report the progress
 			else:
-				self.ch = deepcopy(self.ch_origin)
+				self.undo(moves)  # --> revert the candidate in place
+			i += 1
 		self.info += f"\nInitial score --> {self.initial_score}, New score --> {solution_eval}\n"
 		# return [solution, solution_eval]
 
 
+## Best-improvement local search
+#  Every iteration relocates the hub of a random cluster to its best node and reallocates the farthest node of
+#  a random cluster to its best cluster. Each move evaluates all of its candidates at once and is kept only if
+#  it improves the score. Hubs are first set to the 1-centers of the clusters where that does not worsen the score.
+class BestImprovement(Heuristics):
+	def __init__(self, ch, n_iterations=None, time_budget=None, patience=None, seed=None):
+		super().__init__(ch, n_iterations, time_budget, patience, seed)
+
+	## Run --> best-improvement local search
+	def evaluate(self):
+		self.info += f"\nRunning best-improvement local search ({self.describe_budget()})\n"
+		solution_eval = self.initial_score
+		self.info += f"Initial score is {self.initial_score}\n\n"
+		for cluster in self.ch.clusters:  # kept unless worse, a smaller radius helps later moves even if the score is the same
+			moves = self.one_center_relocation(cluster)
+			if moves and self.objective.score() <= solution_eval:
+				solution_eval = self.objective.score()
+				self.save_best(solution_eval)
+			else:
+				self.undo(moves)
+		self.info += f"1-center hubs, score --> {solution_eval:.3f}\n"
+		i = 0
+		while self.budget_left(i):
+			for move in (self.best_hub_relocation, self.best_node_reallocation):
+				moves = move()
+				if not moves:
+					continue
+				candidate_eval = self.objective.score()
+				if candidate_eval < solution_eval:
+					self.save_best(candidate_eval)
+					solution_eval = candidate_eval
+					self.info += f"Iteration({i}) - New solution found, new score --> {solution_eval:.3f}\n"
+				else:
+					self.undo(moves)
+			i += 1
+		self.info += f"\nInitial score --> {self.initial_score}, New score --> {solution_eval}\n"
+
+
+## Base class for cooling schedules of simulated annealing
+#  Temperature is a function of the progress of the run (fraction of iteration or time budget used),
+#  so the same schedule works with both budgets
+class CoolingSchedule:
+	def __init__(self):
+		self.initial_temperature = None
+		self.final_temperature = None
+
+	## Called once before the run
+	def start(self, initial_temperature, final_temperature):
+		self.initial_temperature = initial_temperature
+		self.final_temperature = final_temperature
+
+	## Temperature at given progress in [0, 1]
+	#  Override this function
+	def temperature(self, progress):
+		...
+
+	## Called after every iteration, improved is True if a new best solution is found
+	def notify(self, improved):
+		...
+
+
+## Geometric cooling, temperature decreases exponentially from initial to final temperature
+class GeometricCooling(CoolingSchedule):
+	def temperature(self, progress):
+		return self.initial_temperature * (self.final_temperature / self.initial_temperature) ** progress
+
+
+## Linear cooling, temperature decreases linearly from initial to final temperature
+class LinearCooling(CoolingSchedule):
+	def temperature(self, progress):
+		return self.initial_temperature + (self.final_temperature - self.initial_temperature) * progress
+
+
+## Geometric cooling with adaptive reheating
+#  If no new best solution is found for reheat_patience iterations, temperature is multiplied by reheat_factor
+#  (never exceeding the initial temperature). Finding a new best solution cancels the reheating.
+class AdaptiveCooling(GeometricCooling):
+	## Constructor
+	# @param reheat_patience Number of iterations without improvement before reheating
+	# @param reheat_factor Multiplier of the temperature at every reheating
+	def __init__(self, reheat_patience=1000, reheat_factor=1.5):
+		super().__init__()
+		self.reheat_patience = reheat_patience
+		self.reheat_factor = reheat_factor
+		self.boost = 1.0
+		self.stalled = 0
+
+	def start(self, initial_temperature, final_temperature):
+		super().start(initial_temperature, final_temperature)
+		self.boost = 1.0
+		self.stalled = 0
+
+	def temperature(self, progress):
+		return min(self.initial_temperature, super().temperature(progress) * self.boost)
+
+	def notify(self, improved):
+		if improved:
+			self.boost = 1.0
+			self.stalled = 0
+		else:
+			self.stalled += 1
+			if self.stalled >= self.reheat_patience:
+				self.boost *= self.reheat_factor
+				self.stalled = 0
+
+
+## Cooling schedules by name
+COOLING_SCHEDULES = {"geometric": GeometricCooling, "linear": LinearCooling, "adaptive": AdaptiveCooling}
+
+
 ## SimulatedAnnealing optimization algorithm
+#  Every iteration applies one random move, which is accepted if it does not worsen the solution,
+#  or with probability exp(-delta / temperature) otherwise. Rejected moves are undone in place.
+#  A move is either a single move or, with compound_probability, the compound move of hill climbing (hub relocation,
+#  reallocation and swap together). If no new best solution is found for restart_patience iterations, the search
+#  returns to the best solution, so it does not drift away from it for the rest of the run.
 class SimulatedAnnealing(Heuristics):
 	## Constructor
-	# @param n_iterations Number of iterations.
-	def __init__(self, ch, n_iterations):
-		super().__init__(ch, n_iterations)
+	#  Temperature follows the iteration and/or time budget, with only a patience it stays at initial temperature
+	# @param cooling CoolingSchedule instance or name of a schedule in COOLING_SCHEDULES
+	# @param initial_temperature Initial temperature, estimated from random moves when None
+	# @param final_temperature Final temperature, 1/1000 of initial temperature when None
+	# @param compound_probability Probability of a compound move instead of a single move
+	# @param restart_patience Number of iterations without a new best solution before returning to it, None to never return
+	def __init__(self, ch, n_iterations=None, time_budget=None, patience=None, seed=None, cooling="geometric", initial_temperature=None, final_temperature=None,
+				 compound_probability=0.5, restart_patience=2000):
+		super().__init__(ch, n_iterations, time_budget, patience, seed)
+		self.cooling = COOLING_SCHEDULES[cooling]() if isinstance(cooling, str) else cooling
+		self.initial_temperature = initial_temperature
+		self.final_temperature = final_temperature
+		self.compound_probability = compound_probability
+		self.restart_patience = restart_patience
+
+	## Apply one randomly chosen move, single or compound
+	#  @return Undo records of the move
+	def random_move(self):
+		if self.rng.random() < self.compound_probability:
+			return self.relocate_hub() + self.reallocate_node() + self.swap_nodes()
+		move = self.rng.integers(3)
+		if move == 0:
+			return self.relocate_hub()
+		elif move == 1:
+			return self.reallocate_node()
+		return self.swap_nodes()
+
+	## Estimate initial temperature from the worsening of random moves
+	#  Worsening of random moves is heavy-tailed (a random hub relocation can be very bad), so the temperature is set
+	#  so that the smallest 5% of the worsening moves are accepted with probability acceptance.
+	#  Sampled moves are undone, the solution is not changed
+	# @param n_samples Number of random moves to sample
+	# @param acceptance Initial acceptance probability of a small worsening move
+	def estimate_initial_temperature(self, n_samples=100, acceptance=0.01):
+		current_eval = self.objective.score()
+		deltas = list()
+		for _ in range(n_samples):
+			moves = self.random_move()
+			delta = self.objective.score() - current_eval
+			if delta > 0:
+				deltas.append(delta)
+			self.undo(moves)
+		if not deltas:
+			return max(current_eval, 1.0) * 1e-3
+		return -np.percentile(deltas, 5) / math.log(acceptance)
 
 	## Run --> simulated annealing
 	def evaluate(self):
-		...
+		if self.initial_temperature is None:
+			self.initial_temperature = self.estimate_initial_temperature()
+		if self.final_temperature is None:
+			self.final_temperature = self.initial_temperature * 1e-3
+		self.cooling.start(self.initial_temperature, self.final_temperature)
+
+		self.info += f"\nRunning simulated annealing algorithm ({self.describe_budget()})\n"
+		self.info += f"Cooling : {type(self.cooling).__name__}, temperature {self.initial_temperature:.3f} --> {self.final_temperature:.3f}\n"
+		self.info += f"Initial score is {self.initial_score}\n\n"
+
+		current_eval = self.initial_score
+		best_eval = self.initial_score
+		restart_iteration = 0
+		i = 0
+		while self.budget_left(i):
+			if self.restart_patience is not None and i - max(self.best_iteration, restart_iteration) >= self.restart_patience and current_eval > best_eval:
+				self.ch.set_solution(*self.best_solution)
+				self.objective.rebuild()
+				current_eval = best_eval
+				restart_iteration = i
+			temperature = self.cooling.temperature(self.progress(i))
+
+			moves = self.random_move()
+			improved = False
+			if moves:
+				candidate_eval = self.objective.score()
+				delta = candidate_eval - current_eval
+				if delta <= 0 or self.rng.random() < math.exp(-delta / temperature):
+					current_eval = candidate_eval
+					if current_eval < best_eval:
+						self.save_best(current_eval)
+						best_eval = current_eval
+						improved = True
+						self.info += f"Iteration({i}) - New solution found, new score --> {best_eval:.3f}\n"
+				else:
+					self.undo(moves)
+			self.cooling.notify(improved)
+			i += 1
+		self.info += f"\nInitial score --> {self.initial_score}, New score --> {best_eval}\n"
+
+
+## Heuristics by name
+HEURISTICS = {"hill_climbing": HillClimbing, "simulated_annealing": SimulatedAnnealing, "best_improvement": BestImprovement}
+
+
+## Statistics of one run of a multi-start search
+@dataclass
+class RunStats:
+	run: int
+	seed: int
+	initial_solution: int  # index of the initial solution the run started from
+	initial_score: float
+	best_score: float
+	best_iteration: int
+	iterations: int
+	elapsed_time: float  # seconds
+
+
+_multi_start_holders = None  # initial solutions of the current worker process
+
+
+## Initializer of multi-start worker processes
+#  Initial solutions are sent once per process instead of once per run
+def _init_multi_start(holders):
+	global _multi_start_holders
+	_multi_start_holders = holders
+
+
+## Run one heuristic on a copy of an initial solution, the copy shares the data cloud and distances
+#  @return Best solution (labels, hubs) and RunStats of the run
+def _run_multi_start(heuristic, run, holder_index, seed, kwargs):
+	h = heuristic(_multi_start_holders[holder_index].copy(), seed=seed, **kwargs).run()
+	stats = RunStats(run, seed, holder_index, float(h.initial_score), float(h.best_score), h.best_iteration, h.iteration, h.elapsed_time())
+	return h.best_solution, stats
+
+
+## Run independent heuristic searches in parallel processes and keep the best solution
+#  Runs start from the initial solutions in turn, each with its own seed. Only labels and hubs of the best
+#  solutions are sent back from the worker processes. Disk-backed distance matrices are reopened by the workers
+#  instead of being copied.
+# @param holders Initial solution (ClusterHolder) or list of initial solutions, e.g. from different clusterings
+# @param heuristic Heuristics subclass to run
+# @param n_runs Number of runs, defaults to the number of initial solutions
+# @param n_workers Number of worker processes, defaults to the number of CPUs. With 1 runs are done in this process.
+# @param seed Seed the seeds of the runs are derived from
+# @param kwargs Other arguments of the heuristic, e.g. n_iterations, time_budget, patience
+# @return Best solution (new ClusterHolder object) and list of RunStats, one per run
+def multi_start(holders, heuristic=HillClimbing, n_runs=None, n_workers=None, seed=None, **kwargs):
+	if isinstance(holders, ClusterHolder):
+		holders = [holders]
+	if n_runs is None:
+		n_runs = len(holders)
+	n_workers = min(n_workers or os.cpu_count() or 1, n_runs)
+	seeds = np.random.SeedSequence(seed).generate_state(n_runs)
+	tasks = [(heuristic, run, run % len(holders), int(seeds[run]), kwargs) for run in range(n_runs)]
+
+	if n_workers == 1:
+		_init_multi_start(holders)
+		try:
+			results = [_run_multi_start(*task) for task in tasks]
+		finally:
+			_init_multi_start(None)
+	else:
+		with ProcessPoolExecutor(n_workers, initializer=_init_multi_start, initargs=(holders,)) as executor:
+			results = list(executor.map(_run_multi_start, *zip(*tasks)))
+
+	solution, best = min(results, key=lambda result: result[1].best_score)
+	ch = holders[best.initial_solution].copy()
+	ch.set_solution(*solution)
+	return ch, [stats for _, stats in results]
@@ -0,0 +1,74 @@
+## @package linkage
+#  Hierarchical clustering as a linkage tree that is built once and cut at any number of clusters
+#  Building the tree costs O(n^2), a cut costs O(n log n), so sweeping the number of hubs does not rebuild it.
+
+import numpy as np
+from scipy.cluster.hierarchy import linkage
+from cache import data_fingerprint, LRUCache
+from utils import ClusterHolder
+
+## scipy metric names of the affinities of HierarchicalParams
+METRICS = {"euclidean": "euclidean", "l2": "euclidean", "manhattan": "cityblock", "l1": "cityblock", "cosine": "cosine"}
+
+
+## Linkage tree (dendrogram) of a data cloud
+class LinkageTree:
+    ## Build the tree
+    # @param data Data cloud
+    # @param method Linkage criterion: ward, complete, average or single
+    # @param affinity Metric between nodes (see METRICS), ward needs euclidean
+    def __init__(self, data, method="ward", affinity="euclidean"):
+        if affinity not in METRICS:
+            raise ValueError(f"Unsupported affinity {affinity!r} for hierarchical clustering, supported: {', '.join(METRICS)}")
+        self.n_nodes = len(data)
+        self.method = method
+        self.affinity = affinity
+        # row i merges clusters merges[i, 0] and merges[i, 1] into cluster n_nodes + i
+        self.merges = linkage(np.asarray(data, dtype=np.float64), method=method, metric=METRICS[affinity])[:, :2].astype(np.intp)
+
+    ## Cut the tree into n_clusters clusters
+    #  The first n_nodes - n_clusters merges are applied as a union-find forest, roots are found by pointer jumping
+    # @param n_clusters Number of clusters, between 1 and the number of nodes
+    # @return Cluster index of every node
+    def cut(self, n_clusters):
+        if not 1 <= n_clusters <= self.n_nodes:
+            raise ValueError(f"n_clusters must be between 1 and {self.n_nodes}, got {n_clusters}")
+        n_merges = self.n_nodes - n_clusters
+        parent = np.arange(2 * self.n_nodes - 1)
+        merged = self.n_nodes + np.arange(n_merges)
+        parent[self.merges[:n_merges, 0]] = merged
+        parent[self.merges[:n_merges, 1]] = merged
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+        _, labels = np.unique(parent[:self.n_nodes], return_inverse=True)
+        return labels
+
+    ## Cut the tree into a solution
+    # @param data Data cloud the tree is built on
+    # @param n_clusters Number of clusters
+    # @param distances Distance oracle of the data cloud, optional
+    # @param alpha Discount factor of the hub-to-hub distance in the objective function
+    # @return New ClusterHolder object
+    def cluster_holder(self, data, n_clusters, distances=None, alpha=0.75):
+        return ClusterHolder(data, self.cut(n_clusters), alpha=alpha, distances=distances)
+
+
+## Recently used linkage trees, by data fingerprint and linkage setting
+trees = LRUCache(8)
+
+
+## Linkage tree of a data cloud, built once per data cloud and linkage setting
+# @param data Data cloud
+# @param method Linkage criterion
+# @param affinity Metric between nodes
+# @return LinkageTree
+def linkage_tree(data, method="ward", affinity="euclidean"):
+    key = (data_fingerprint(data), method, affinity)
+    tree = trees.get(key)
+    if tree is None:
+        tree = LinkageTree(data, method, affinity)
+        trees.put(key, tree)
+    return tree
@@ -0,0 +1,68 @@
+## @package neighbors
+#  Neighbor graphs of a data cloud, built once and reused by clustering fits
+#  Radius neighbor graph holds every pair of nodes closer than its radius, so a DBSCAN fit with a smaller or equal eps
+#  (and any min_samples) only filters the graph instead of searching the neighbors again.
+#  k-NN affinity graph is the sparse affinity matrix of spectral clustering, reused for any number of clusters.
+
+from sklearn.neighbors import NearestNeighbors, kneighbors_graph
+from cache import data_fingerprint, LRUCache
+
+
+## Radius neighbor graph of a data cloud
+class NeighborGraph:
+    ## Build the graph
+    # @param data Data cloud
+    # @param radius Largest distance between neighbors
+    # @param p Power of the Minkowski metric
+    # @param algorithm Spatial index used to search the neighbors: auto, ball_tree, kd_tree or brute
+    def __init__(self, data, radius, p=2, algorithm="auto"):
+        self.radius = radius
+        self.p = p
+        # sparse n x n matrix of distances, rows sorted by distance as DBSCAN expects for precomputed input.
+        # Every node is its own neighbor with an explicitly stored zero distance.
+        self.graph = NearestNeighbors(radius=radius, p=p, algorithm=algorithm).fit(data).radius_neighbors_graph(data, mode="distance", sort_results=True)
+
+    ## Check if the graph holds all neighbors within eps
+    def covers(self, eps):
+        return eps <= self.radius
+
+
+## Recently used neighbor graphs, by data fingerprint, metric and spatial index
+graphs = LRUCache(4)
+
+
+## Neighbor graph of a data cloud holding all neighbors within eps
+#  Cached graph is reused if its radius is at least eps, otherwise it is rebuilt with radius max(eps, radius).
+# @param data Data cloud
+# @param eps Distance the graph must cover
+# @param p Power of the Minkowski metric
+# @param algorithm Spatial index used to search the neighbors
+# @param radius Radius to build the graph with, e.g. the largest eps of a sweep, optional
+# @return NeighborGraph
+def neighbor_graph(data, eps, p=2, algorithm="auto", radius=None):
+    key = (data_fingerprint(data), p, algorithm)
+    graph = graphs.get(key)
+    if graph is None or not graph.covers(eps):
+        graph = NeighborGraph(data, max(eps, radius or 0), p, algorithm)
+        graphs.put(key, graph)
+    return graph
+
+
+## Recently used k-NN affinity graphs, by data fingerprint and number of neighbors
+affinities = LRUCache(4)
+
+
+## Sparse k-NN affinity matrix of a data cloud
+#  Connectivity graph of the n_neighbors nearest neighbors (node itself included), symmetrized as 0.5 * (A + A^T),
+#  same as the 'nearest_neighbors' affinity of SpectralClustering
+# @param data Data cloud
+# @param n_neighbors Number of neighbors
+# @return Sparse n x n matrix
+def knn_affinity(data, n_neighbors=10):
+    key = (data_fingerprint(data), n_neighbors)
+    affinity = affinities.get(key)
+    if affinity is None:
+        connectivity = kneighbors_graph(data, n_neighbors=n_neighbors, include_self=True)
+        affinity = (0.5 * (connectivity + connectivity.T)).tocsr()
+        affinities.put(key, affinity)
+    return affinity
@@ -0,0 +1,61 @@
+## @package onecenter
+#  Discrete 1-center of a cluster: the node whose distance to the farthest node of the cluster (radius) is the smallest
+#  Radius of every candidate is bounded from below by its distance to a set of probe nodes. Candidates are evaluated
+#  exactly in the order of their bounds, every evaluated candidate adds its farthest node to the probes, and the search
+#  stops when no bound is below the best value found, so usually a few rows of distances are computed instead of O(m^2).
+#  With straight-line distances the farthest node from any point is a vertex of the convex hull of the cluster,
+#  so the hull vertices are exact probes and one exact evaluation is enough.
+
+import numpy as np
+from scipy.spatial import ConvexHull, QhullError
+from distances import EuclideanDistances
+
+## Largest dimension the convex hull is computed in, hulls of higher dimensions have too many vertices
+MAX_HULL_DIMENSION = 3
+
+
+## Nodes on the convex hull of a cluster
+# @param data Data cloud
+# @param nodes Indices of the cluster nodes in the data cloud
+# @return Indices of the hull vertices in the data cloud, None if the hull can not be computed (e.g. collinear nodes)
+def hull_nodes(data, nodes):
+    points = np.asarray(data[nodes], dtype=np.float64)
+    if points.shape[1] > MAX_HULL_DIMENSION or len(nodes) <= points.shape[1]:
+        return None
+    try:
+        return nodes[ConvexHull(points).vertices]
+    except QhullError:
+        return None
+
+
+## Find the node of a cluster minimizing cost(radius)
+#  Exact for any distance oracle, cost must not decrease when the radius grows.
+# @param nodes Indices of the cluster nodes in the data cloud
+# @param distances Distance oracle of the data cloud, convex hull is used as probes for EuclideanDistances
+# @param cost Function of (positions of candidates in nodes, their radii) returning their costs, the radius when None
+# @return Data index of the best node and its cost
+def one_center(nodes, distances, cost=None):
+    nodes = np.asarray(nodes, dtype=int)
+    if cost is None:
+        cost = lambda candidates, radii: radii
+    probes = hull_nodes(distances.data, nodes) if isinstance(distances, EuclideanDistances) else None
+    if probes is None:
+        probes = nodes[[np.argmax(distances.between(nodes[0], nodes))]]
+    bounds = np.asarray(distances.pairwise(nodes, probes)).max(axis=1)
+    positions = np.arange(len(nodes))
+    lower = cost(positions, bounds)
+    best, best_cost = 0, np.inf
+    while True:
+        candidate = int(np.argmin(lower))
+        if lower[candidate] >= best_cost:
+            break
+        row = np.asarray(distances.pairwise(nodes[[candidate]], nodes))[0]
+        farthest = int(np.argmax(row))
+        value = cost(positions[[candidate]], row[[farthest]])[0]
+        if value < best_cost:
+            best, best_cost = candidate, value
+        if row[farthest] > bounds[candidate]:  # farthest node is a new probe, it tightens the bounds
+            bounds = np.maximum(bounds, np.asarray(distances.pairwise(nodes, nodes[[farthest]]))[:, 0])
+            lower = cost(positions, bounds)
+        lower[candidate] = np.inf  # evaluated exactly
+    return int(nodes[best]), float(best_cost)
@@ -6,12 +6,14 @@ from dataclasses import dataclass
 # @param init Number of time the k-means algorithm will be run with different centroid seeds. The final results will be the best output of n_init consecutive runs in terms of inertia.
 # @param max_iter Maximum number of iterations of the k-means algorithm for a single run.
 # @param algorithm K-means algorithm to use.
+# @param warm_start Start from the centers of the previous fit on the same data cloud if only n_clusters or max_iter changed.
 @dataclass
 class KMeansParams:
     n_clusters: int = 3
     init: str = "k-means++"
     max_iter: int = 300
     algorithm: str = "auto"
+    warm_start: bool = True
 
 
 ## Dataclass for holding parameters of clustering algorithm
@@ -48,18 +50,26 @@ class MeanShiftParams:
 # @param n_components Number of eigenvectors to use for the spectral embedding.
 # @param n_init Number of time the k-means algorithm will be run with different centroid seeds.
 # @param assign_labels The strategy for assigning labels in the embedding space.
+# @param affinity How to construct the affinity matrix. 'rbf' builds a dense n x n matrix, 'nearest_neighbors' a sparse k-NN graph.
+# @param n_neighbors Number of neighbors of the 'nearest_neighbors' affinity.
+# @param eigen_solver The eigenvalue decomposition strategy, 'lobpcg' or 'amg' (needs pyamg) scale to large sparse graphs. None for arpack.
+# @param warm_start Start the k-means stage from the clusters of the previous fit on the same data cloud if only n_clusters or n_components changed.
 @dataclass
 class SpectralParams:
     n_clusters: int = 3
     n_components: int = None
     n_init: int = 10
     assign_labels: str = 'kmeans'
+    affinity: str = 'rbf'
+    n_neighbors: int = 10
+    eigen_solver: str = None
+    warm_start: bool = True
 
 
 ## Dataclass for holding parameters of clustering algorithm
 #  Initialized by default values
 # @param n_clusters The number of clusters to find.
-# @param affinity Metric used to compute the linkage.
+# @param affinity Metric used to compute the linkage: euclidean, l1, l2, manhattan or cosine.
 # @param linkage Which linkage criterion to use. The linkage criterion determines which distance to use between sets of observation.
 @dataclass
 class HierarchicalParams:
@@ -73,10 +83,72 @@ class HierarchicalParams:
 # @param eps The maximum distance between two samples for one to be considered as in the neighborhood of the other.
 # @param min_samples The number of samples (or total weight) in a neighborhood for a point to be considered as a core point. This includes the point itself.
 # @param algorithm The algorithm to be used by the NearestNeighbors module to compute pointwise distances and find nearest neighbors.
-# @param p The power of the Minkowski metric to be used to calculate distance between points.
+# @param p The power of the Minkowski metric. Not used, distances are Euclidean like the hub objective (scikit-learn ignores p with metric='euclidean' too).
+# @param graph_eps Radius of the cached neighbor graph, e.g. the largest eps to be tried. Fits with eps up to it reuse the graph. None for eps.
 @dataclass
 class DBSCANParams:
     eps: float = 0.5
     min_samples: int = 5
     algorithm: str = 'auto'
     p: float = 2
+    graph_eps: float = None
+
+
+## Dataclass for holding parameters of clustering algorithm
+#  Initialized by default values
+# @param n_clusters The number of clusters to form as well as the number of centroids to generate.
+# @param batch_size Number of nodes in each mini batch.
+# @param max_iter Maximum number of passes over the data cloud.
+# @param n_init Number of random initializations that are tried, the best one is used.
+# @param random_state Pseudo-random number generator to control the initialization and the batches.
+@dataclass
+class MiniBatchKMeansParams:
+    n_clusters: int = 3
+    batch_size: int = 1024
+    max_iter: int = 100
+    n_init: int = 3
+    random_state: int = None
+
+
+## Dataclass for holding parameters of clustering algorithm
+#  Initialized by default values
+# @param n_clusters Number of clusters after the final global clustering of the subclusters.
+# @param threshold Largest radius of a subcluster, None for 1/100 of the diagonal of the bounding box of the data cloud.
+# @param branching_factor Maximum number of subclusters in each node of the CF tree.
+@dataclass
+class BirchParams:
+    n_clusters: int = 3
+    threshold: float = None
+    branching_factor: int = 50
+
+
+## Dataclass for holding parameters of clustering algorithm
+#  Initialized by default values
+#  Clustering algorithm is fitted on a random sample, other nodes are assigned to the cluster of their nearest sampled node.
+# @param algorithm Name of the clustering algorithm fitted on the sample (see clustering.CLUSTERINGS).
+# @param sample_size Number of sampled nodes.
+# @param n_clusters The number of clusters, for algorithms that have this parameter and do not set it in params.
+# @param random_state Pseudo-random number generator to control the sample.
+# @param params Parameters of the sampled algorithm, dictionary of parameter name --> value. Defaults of its parameters dataclass for the others.
+@dataclass
+class SampledParams:
+    algorithm: str = "affinity"
+    sample_size: int = 2000
+    n_clusters: int = 3
+    random_state: int = None
+    params: dict = None
+
+
+## Dataclass for holding parameters of heuristics
+#  Initialized by default values
+#  A run stops when any of the given budgets is over, at least one of them must be given
+# @param n_iterations Maximum number of iterations, None for no limit.
+# @param time_budget Maximum running time in seconds, None for no limit.
+# @param patience Number of iterations without a new best solution before stopping, None for no limit.
+# @param seed Seed of the random number generator of the moves.
+@dataclass
+class HeuristicsParams:
+    n_iterations: int = None
+    time_budget: float = 5.0
+    patience: int = None
+    seed: int = None
@@ -41,7 +41,6 @@ class Ui_Form(object):
         self.affinity.addItem("")
         self.affinity.addItem("")
         self.affinity.addItem("")
-        self.affinity.addItem("")
         self.horizontalLayout_3.addWidget(self.affinity)
         self.verticalLayout.addWidget(self.groupBox_3)
         self.groupBox_6 = QtWidgets.QGroupBox(Form)
@@ -88,7 +87,6 @@ class Ui_Form(object):
         self.affinity.setItemText(2, _translate("Form", "l2"))
         self.affinity.setItemText(3, _translate("Form", "manhattan"))
         self.affinity.setItemText(4, _translate("Form", "cosine"))
-        self.affinity.setItemText(5, _translate("Form", "precomputed"))
         self.linkage_text.setText(_translate("Form", "linkage: str , default = ward"))
         self.linkage.setItemText(0, _translate("Form", "ward"))
         self.linkage.setItemText(1, _translate("Form", "complete"))
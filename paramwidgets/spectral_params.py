@@ -5,7 +5,7 @@ from PyQt5 import QtCore, QtGui, QtWidgets
 class Ui_Form(object):
     def setupUi(self, Form):
         Form.setObjectName("Form")
-        Form.resize(520, 463)
+        Form.resize(520, 640)
         self.verticalLayout = QtWidgets.QVBoxLayout(Form)
         self.verticalLayout.setObjectName("verticalLayout")
         self.groupBox = QtWidgets.QGroupBox(Form)
@@ -80,6 +80,63 @@ class Ui_Form(object):
         self.assign_labels.addItem("")
         self.horizontalLayout_4.addWidget(self.assign_labels)
         self.verticalLayout.addWidget(self.groupBox_4)
+        self.groupBox_7 = QtWidgets.QGroupBox(Form)
+        self.groupBox_7.setTitle("")
+        self.groupBox_7.setObjectName("groupBox_7")
+        self.horizontalLayout_7 = QtWidgets.QHBoxLayout(self.groupBox_7)
+        self.horizontalLayout_7.setObjectName("horizontalLayout_7")
+        self.affinity_text = QtWidgets.QLabel(self.groupBox_7)
+        self.affinity_text.setObjectName("affinity_text")
+        self.horizontalLayout_7.addWidget(self.affinity_text)
+        self.affinity = QtWidgets.QComboBox(self.groupBox_7)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.affinity.sizePolicy().hasHeightForWidth())
+        self.affinity.setSizePolicy(sizePolicy)
+        self.affinity.setObjectName("affinity")
+        self.affinity.addItem("")
+        self.affinity.addItem("")
+        self.horizontalLayout_7.addWidget(self.affinity)
+        self.verticalLayout.addWidget(self.groupBox_7)
+        self.groupBox_8 = QtWidgets.QGroupBox(Form)
+        self.groupBox_8.setTitle("")
+        self.groupBox_8.setObjectName("groupBox_8")
+        self.horizontalLayout_8 = QtWidgets.QHBoxLayout(self.groupBox_8)
+        self.horizontalLayout_8.setObjectName("horizontalLayout_8")
+        self.n_neighbors_text = QtWidgets.QLabel(self.groupBox_8)
+        self.n_neighbors_text.setObjectName("n_neighbors_text")
+        self.horizontalLayout_8.addWidget(self.n_neighbors_text)
+        self.n_neighbors = QtWidgets.QLineEdit(self.groupBox_8)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.n_neighbors.sizePolicy().hasHeightForWidth())
+        self.n_neighbors.setSizePolicy(sizePolicy)
+        self.n_neighbors.setObjectName("n_neighbors")
+        self.horizontalLayout_8.addWidget(self.n_neighbors)
+        self.verticalLayout.addWidget(self.groupBox_8)
+        self.groupBox_9 = QtWidgets.QGroupBox(Form)
+        self.groupBox_9.setTitle("")
+        self.groupBox_9.setObjectName("groupBox_9")
+        self.horizontalLayout_9 = QtWidgets.QHBoxLayout(self.groupBox_9)
+        self.horizontalLayout_9.setObjectName("horizontalLayout_9")
+        self.eigen_solver_text = QtWidgets.QLabel(self.groupBox_9)
+        self.eigen_solver_text.setObjectName("eigen_solver_text")
+        self.horizontalLayout_9.addWidget(self.eigen_solver_text)
+        self.eigen_solver = QtWidgets.QComboBox(self.groupBox_9)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.eigen_solver.sizePolicy().hasHeightForWidth())
+        self.eigen_solver.setSizePolicy(sizePolicy)
+        self.eigen_solver.setObjectName("eigen_solver")
+        self.eigen_solver.addItem("")
+        self.eigen_solver.addItem("")
+        self.eigen_solver.addItem("")
+        self.eigen_solver.addItem("")
+        self.horizontalLayout_9.addWidget(self.eigen_solver)
+        self.verticalLayout.addWidget(self.groupBox_9)
         self.groupBox_5 = QtWidgets.QGroupBox(Form)
         self.groupBox_5.setTitle("")
         self.groupBox_5.setObjectName("groupBox_5")
@@ -110,6 +167,16 @@ class Ui_Form(object):
         self.assign_labels.setItemText(0, _translate("Form", "kmeans"))
         self.assign_labels.setItemText(1, _translate("Form", "discretize"))
         self.assign_labels.setItemText(2, _translate("Form", "cluster_qr"))
+        self.affinity_text.setText(_translate("Form", "affinity: str , default = rbf"))
+        self.affinity.setItemText(0, _translate("Form", "rbf"))
+        self.affinity.setItemText(1, _translate("Form", "nearest_neighbors"))
+        self.n_neighbors_text.setText(_translate("Form", "n_neighbors: int , default = 10"))
+        self.n_neighbors.setText(_translate("Form", "10"))
+        self.eigen_solver_text.setText(_translate("Form", "eigen_solver: str , default = None"))
+        self.eigen_solver.setItemText(0, _translate("Form", "None"))
+        self.eigen_solver.setItemText(1, _translate("Form", "arpack"))
+        self.eigen_solver.setItemText(2, _translate("Form", "lobpcg"))
+        self.eigen_solver.setItemText(3, _translate("Form", "amg"))
         self.OKButton.setText(_translate("Form", "OK"))
         self.CancelButton.setText(_translate("Form", "Cancel"))
 
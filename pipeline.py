@@ -0,0 +1,225 @@
+## @package pipeline
+#  Runs data cloud --> clustering --> heuristics --> solution file without the GUI
+#  Nothing here imports Qt or renders plots, so it runs on headless servers.
+#
+#  Command line usage:
+#  python pipeline.py resources/data/100.txt -a kmeans -p n_clusters=5 algorithm=lloyd -H hill_climbing --time-budget 10 -o solution.json
+
+import argparse
+import ast
+import json
+import time
+from dataclasses import dataclass, field, fields, asdict
+from clustering import CLUSTERINGS
+from cache import clustering_cache
+from distances import default_distances, DistanceMatrix, MAX_MATRIX_NODES
+from dataio import load_data
+from heuristics import HEURISTICS, multi_start
+from params import HeuristicsParams
+
+
+## dataclass for holding the result of a pipeline run
+# @param algorithm Name of the clustering algorithm
+# @param params Parameters of the clustering algorithm
+# @param heuristic Name of the heuristic, None if no heuristic is run
+# @param heuristic_params Parameters of the heuristic
+# @param initial_solution ClusterHolder of the clustering
+# @param final_solution ClusterHolder after the heuristic, same as initial_solution if no heuristic is run
+# @param runs RunStats of every heuristic run
+# @param clustering_time Running time of the clustering in seconds
+# @param heuristic_time Running time of the heuristic in seconds
+@dataclass
+class PipelineResult:
+    algorithm: str
+    params: object
+    heuristic: str
+    heuristic_params: dict
+    initial_solution: object
+    final_solution: object
+    runs: list = field(default_factory=list)
+    clustering_time: float = 0.0
+    heuristic_time: float = 0.0
+
+    ## Objective function score of the clustering
+    def initial_score(self):
+        return float(self.initial_solution.calculate_objective_function())
+
+    ## Objective function score of the final solution
+    def final_score(self):
+        return float(self.final_solution.calculate_objective_function())
+
+
+## Run clustering and then heuristics on a data cloud
+# @param data Data cloud
+# @param algorithm Name of the clustering algorithm (see clustering.CLUSTERINGS)
+# @param params Parameters dataclass of the clustering algorithm, default parameters when None
+# @param heuristic Name of the heuristic (see heuristics.HEURISTICS), None to only run the clustering
+# @param heuristic_params Keyword arguments of the heuristic, HeuristicsParams defaults when None
+# @param n_starts Number of heuristic runs, more than one runs multi_start over a process pool
+# @param n_workers Number of worker processes of multi_start, defaults to the number of CPUs
+# @param distances Distance oracle of the data cloud, default_distances when None (matrix only for small data clouds)
+# @param one_center If True, hubs of the clustering are set to the 1-centers of the clusters (see onecenter.py)
+# @return PipelineResult
+def run_pipeline(data, algorithm="kmeans", params=None, heuristic="hill_climbing", heuristic_params=None, n_starts=1, n_workers=None, distances=None, one_center=False):
+    clustering_class, params_class = CLUSTERINGS[algorithm]
+    if params is None:
+        params = params_class()
+    if heuristic_params is None:
+        heuristic_params = asdict(HeuristicsParams())
+    if distances is None:
+        distances = default_distances(data)
+
+    start = time.perf_counter()
+    initial_solution = clustering_class(data, params, distances=distances).get_cluster_holder()
+    if one_center:
+        initial_solution.optimize_hubs()
+    result = PipelineResult(algorithm, params, heuristic, heuristic_params, initial_solution, initial_solution,
+                            clustering_time=time.perf_counter() - start)
+    if heuristic is None:
+        return result
+
+    start = time.perf_counter()
+    if n_starts > 1:
+        seed = heuristic_params.get("seed")
+        kwargs = {key: value for key, value in heuristic_params.items() if key != "seed"}
+        result.final_solution, result.runs = multi_start(initial_solution, HEURISTICS[heuristic], n_starts, n_workers, seed, **kwargs)
+    else:
+        heuristics = HEURISTICS[heuristic](initial_solution.copy(), **heuristic_params).run()
+        result.final_solution = heuristics.ch
+    result.heuristic_time = time.perf_counter() - start
+    return result
+
+
+## Save the result of a pipeline run
+#  *.json files hold labels, hubs, scores and run statistics, other files hold the same text report as the GUI
+# @param path Path of the solution file
+# @param result PipelineResult
+def save_solution(path, result):
+    if path.endswith(".json"):
+        solution = {
+            "algorithm": result.algorithm,
+            "params": asdict(result.params),
+            "heuristic": result.heuristic,
+            "heuristic_params": result.heuristic_params,
+            "noise_nodes": result.initial_solution.n_noise,
+            "initial_score": result.initial_score(),
+            "score": result.final_score(),
+            "labels": result.final_solution.labels.tolist(),
+            "hubs": [int(hub) for hub in result.final_solution.get_hubs()],
+            "clustering_time": result.clustering_time,
+            "heuristic_time": result.heuristic_time,
+            "runs": [asdict(stats) for stats in result.runs],
+        }
+        with open(path, "w") as f:
+            json.dump(solution, f, indent=2)
+    else:
+        result.final_solution.rewrite_info()
+        with open(path, "w") as f:
+            f.write(result.final_solution.info)
+
+
+## Convert a command line value
+#  Value is converted to value_type, or read as a Python literal (kept as string if it is not one) when
+#  value_type is None. "None" is None for every type.
+# @param value Value string
+# @param value_type Type of the value, e.g. type of a parameters dataclass field, optional
+def parse_value(value, value_type=None):
+    if value == "None":
+        return None
+    if value_type is bool:
+        return value.lower() in ("1", "true", "yes")
+    if value_type is dict:
+        value = ast.literal_eval(value)
+        if not isinstance(value, dict):
+            raise ValueError(f"Expected a dictionary, got {value!r}")
+        return value
+    if value_type is not None:
+        return value_type(value)
+    try:
+        return ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return value
+
+
+## Split "key=value" strings
+# @param items List of "key=value" strings
+# @return List of (key, value string)
+def split_items(items):
+    pairs = list()
+    for item in items:
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"Expected key=value, got '{item}'")
+        pairs.append((key, value))
+    return pairs
+
+
+## Convert "key=value" strings to keyword arguments
+#  Values of the fields of params_class are converted to the type of the field, see parse_value.
+#  "field.key=value" sets a key of a dictionary field, e.g. params.eps=3000 of SampledParams.
+# @param items List of "key=value" strings
+# @param params_class Parameters dataclass
+def parse_params(items, params_class):
+    types = {f.name: f.type for f in fields(params_class)}
+    params = dict()
+    for key, value in split_items(items):
+        field_name, dot, inner = key.partition(".")
+        if dot and types.get(field_name) is dict:
+            params.setdefault(field_name, dict())[inner] = parse_value(value)
+        else:
+            params[key] = parse_value(value, types.get(key))
+    return params
+
+
+## Command line entry point
+# @param argv Command line arguments, sys.argv when None
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run clustering and heuristics on a data cloud without the GUI")
+    parser.add_argument("data", help="data file (*.txt, *.csv, *.npy, *.bin, *.dat)")
+    parser.add_argument("-a", "--algorithm", choices=CLUSTERINGS, default="kmeans", help="clustering algorithm")
+    parser.add_argument("-p", "--params", nargs="*", default=[], metavar="KEY=VALUE", help="parameters of the clustering algorithm")
+    parser.add_argument("-H", "--heuristic", choices=list(HEURISTICS) + ["none"], default="hill_climbing", help="heuristic to refine the clustering")
+    parser.add_argument("-P", "--heuristic-params", nargs="*", default=[], metavar="KEY=VALUE", help="other parameters of the heuristic, e.g. cooling=adaptive")
+    parser.add_argument("--n-iterations", type=int, help="iteration budget of the heuristic")
+    parser.add_argument("--time-budget", type=float, help="time budget of the heuristic in seconds")
+    parser.add_argument("--patience", type=int, help="stop the heuristic after this many iterations without a new best solution")
+    parser.add_argument("--seed", type=int, help="seed of the heuristic")
+    parser.add_argument("--starts", type=int, default=1, help="number of heuristic runs, run in parallel and best is kept")
+    parser.add_argument("--workers", type=int, help="number of worker processes for multiple starts")
+    parser.add_argument("--distances", help=f"distance matrix file (*.npy or text). When not given, Euclidean distances, precomputed for up to {MAX_MATRIX_NODES} nodes")
+    parser.add_argument("--one-center", action="store_true", help="set the hubs of the clustering to the 1-centers of the clusters")
+    parser.add_argument("--cache-dir", help="directory to keep clustering results in between runs")
+    parser.add_argument("-o", "--output", help="solution file, *.json or text report, printed when not given")
+    args = parser.parse_args(argv)
+
+    data = load_data(args.data)
+    clustering_cache.disk_dir = args.cache_dir
+    _, params_class = CLUSTERINGS[args.algorithm]
+    try:
+        params = params_class(**parse_params(args.params, params_class))
+    except (ValueError, SyntaxError, TypeError) as e:
+        parser.error(str(e))
+    heuristic = None if args.heuristic == "none" else args.heuristic
+    heuristic_params = {**asdict(HeuristicsParams()), **parse_params(args.heuristic_params, HeuristicsParams)}
+    budget = {"n_iterations": args.n_iterations, "time_budget": args.time_budget, "patience": args.patience}
+    if any(value is not None for value in budget.values()):
+        heuristic_params.update(budget)  # budgets given on the command line replace the default budget
+    if args.seed is not None:
+        heuristic_params["seed"] = args.seed
+    try:
+        distances = DistanceMatrix.from_file(args.distances, len(data)) if args.distances else None
+    except ValueError as e:
+        parser.error(str(e))
+
+    result = run_pipeline(data, args.algorithm, params, heuristic, heuristic_params, args.starts, args.workers, distances, args.one_center)
+    if args.output:
+        save_solution(args.output, result)
+    else:
+        result.final_solution.rewrite_info()
+        print(result.final_solution.info)
+    print(f"Initial score --> {result.initial_score():.3f} ({result.clustering_time:.2f} s), "
+          f"final score --> {result.final_score():.3f} ({result.heuristic_time:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
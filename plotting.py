@@ -0,0 +1,90 @@
+## @package plotting
+#  Plots data clouds and solutions in matplotlib
+#  Every layer (nodes, center points, hubs) is drawn with one scatter call and an array of colors,
+#  so plotting time does not grow with a Python loop over the nodes.
+
+import numpy as np
+from matplotlib import pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+COLORSPACE = np.array(["purple", "cyan", "green", "orange", "brown", "gray", "magenta", "blue", "yellow", "pink"])
+
+## Largest number of visible nodes to write the indices of
+ANNOTATION_LIMIT = 200
+
+
+## Create a figure drawn on an Agg canvas in memory
+#  Figure is not managed by pyplot, so it is never written to disk and can be drawn on any thread
+def new_figure():
+    figure = Figure()
+    FigureCanvasAgg(figure)
+    return figure
+
+
+## Render a figure into an RGBA array
+#  Array is a view of the Agg canvas buffer (no copy), it is valid until the figure is drawn again
+# @param figure Figure created by new_figure
+# @return height x width x 4 uint8 array
+def render_figure(figure):
+    figure.canvas.draw()
+    return np.asarray(figure.canvas.buffer_rgba())
+
+
+## Write node indices next to the nodes, level of detail
+#  Indices are written only when at most limit nodes are in view. They are rewritten when the view
+#  changes, so zooming into a large data cloud shows the indices of the nodes in view.
+# @param ax Axes
+# @param points Coordinates of the nodes
+# @param limit Largest number of visible nodes to write the indices of
+def annotate_indices(ax, points, limit=ANNOTATION_LIMIT):
+    texts = list()
+
+    def update(_=None):
+        for text in texts:
+            text.remove()
+        texts.clear()
+        x0, x1 = sorted(ax.get_xlim())
+        y0, y1 = sorted(ax.get_ylim())
+        visible = np.flatnonzero((points[:, 0] >= x0) & (points[:, 0] <= x1) & (points[:, 1] >= y0) & (points[:, 1] <= y1))
+        if len(visible) <= limit:
+            texts.extend(ax.annotate(i, points[i]) for i in visible)
+
+    update()
+    ax.callbacks.connect("xlim_changed", update)
+    ax.callbacks.connect("ylim_changed", update)
+
+
+## Plot a data cloud with black dots
+# @param data Data cloud
+# @param ax Axes, current axes of pyplot when None
+def plot_data(data, ax=None):
+    ax = ax if ax is not None else plt.gca()
+    ax.scatter(data[:, 0], data[:, 1], color="black")
+    annotate_indices(ax, data)
+
+
+## Plot a solution
+#  Nodes colored by their cluster, center points with red cross, hubs with red dot
+# @param data Data cloud
+# @param labels Cluster index of every node
+# @param center_points Center points of the clusters, not drawn when None
+# @param hubs Data indices of the hubs, not drawn when None
+# @param ax Axes, current axes of pyplot when None
+def plot_solution(data, labels, center_points=None, hubs=None, ax=None):
+    ax = ax if ax is not None else plt.gca()
+    if center_points is not None and len(center_points) > 0:
+        center_points = np.asarray(center_points)
+        ax.scatter(center_points[:, 0], center_points[:, 1], color="red", marker="x", s=130)
+    ax.scatter(data[:, 0], data[:, 1], color=COLORSPACE[np.asarray(labels) % len(COLORSPACE)])
+    annotate_indices(ax, data)
+    if hubs is not None and len(hubs) > 0:
+        hub_points = data[np.asarray(hubs)]
+        ax.scatter(hub_points[:, 0], hub_points[:, 1], color="red")
+
+
+## Plot the clusters of a ClusterHolder
+# @param ch ClusterHolder
+# @param ax Axes, current axes of pyplot when None
+def plot_cluster_holder(ch, ax=None):
+    plot_solution(ch.data, ch.labels, [cluster.center_point for cluster in ch.clusters], ch.get_hubs(), ax)
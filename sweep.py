@@ -0,0 +1,182 @@
+## @package sweep
+#  Parameter sweep of a clustering algorithm
+#  Every combination of the given parameter values is fitted in a process pool and scored with the hub objective
+#  function, results are ranked from the best (lowest) score. Noise nodes (e.g. of DBSCAN) are allocated to their
+#  nearest hub before scoring, so leaving nodes unclustered is not rewarded.
+#
+#  Command line usage:
+#  python sweep.py resources/data/100.txt -a kmeans -r n_clusters=2:10 init=k-means++,random -p algorithm=lloyd -o sweep.csv
+
+import argparse
+import csv
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, fields, replace, asdict
+from clustering import CLUSTERINGS
+from dataio import load_data
+from distances import default_distances
+from pipeline import parse_params, parse_value, split_items
+from utils import ClusterHolder
+
+
+## dataclass for holding the result of one parameter combination
+# @param params Parameters dataclass of the combination
+# @param score Hub objective function score, None if the fit failed
+# @param n_clusters Number of clusters found
+# @param n_noise Number of noise nodes of the clustering, allocated to their nearest hub for scoring
+# @param fit_time Running time of the fit in seconds
+# @param labels Cluster index of every node, noise nodes allocated to their nearest hub
+# @param error Error message if the fit failed
+@dataclass
+class SweepResult:
+    params: object
+    score: float = None
+    n_clusters: int = 0
+    n_noise: int = 0
+    fit_time: float = 0.0
+    labels: object = None
+    error: str = None
+
+
+## All combinations of parameter values
+# @param base Parameters dataclass holding the values of the parameters not swept
+# @param ranges Dictionary of parameter name --> list of values
+# @return List of parameters dataclasses
+def parameter_grid(base, ranges):
+    names = list(ranges)
+    return [replace(base, **dict(zip(names, values))) for values in itertools.product(*(ranges[name] for name in names))]
+
+
+_sweep_data = None  # data cloud, distances and alpha of the current worker process
+
+
+## Initializer of sweep worker processes
+#  Data cloud and distances are sent once per process instead of once per fit
+def _init_sweep(data, distances, alpha):
+    global _sweep_data
+    _sweep_data = (data, distances, alpha)
+
+
+## Fit and score one parameter combination
+#  @return SweepResult
+def _fit_one(algorithm, params):
+    data, distances, alpha = _sweep_data
+    result = SweepResult(params)
+    start = time.perf_counter()
+    try:
+        ch = CLUSTERINGS[algorithm][0](data, params, distances=distances).get_cluster_holder()
+        result.fit_time = time.perf_counter() - start
+        ch.alpha = alpha
+        result.score = float(ch.calculate_objective_function())
+        result.n_clusters = ch.n_clusters
+        result.n_noise = ch.n_noise
+        result.labels = ch.labels
+    except Exception as e:
+        result.fit_time = time.perf_counter() - start
+        result.error = f"{type(e).__name__}: {e}"
+    return result
+
+
+## Fit every parameter combination and rank them by the hub objective function
+# @param data Data cloud
+# @param algorithm Name of the clustering algorithm (see clustering.CLUSTERINGS)
+# @param ranges Dictionary of parameter name --> list of values
+# @param base Parameters dataclass holding the values of the parameters not swept, default parameters when None
+# @param n_workers Number of worker processes, defaults to the number of CPUs. With 1 fits are done in this process.
+# @param distances Distance oracle of the data cloud, default_distances when None (matrix only for small data clouds)
+# @param alpha Discount factor of the hub-to-hub distance in the objective function
+# @return List of SweepResult ranked from the best score (failed fits last) and the best solution (ClusterHolder)
+def sweep(data, algorithm, ranges, base=None, n_workers=None, distances=None, alpha=0.75):
+    if base is None:
+        base = CLUSTERINGS[algorithm][1]()
+    if distances is None:
+        distances = default_distances(data)
+    grid = parameter_grid(base, ranges)
+    n_workers = min(n_workers or os.cpu_count() or 1, len(grid))
+
+    if n_workers <= 1:
+        _init_sweep(data, distances, alpha)
+        try:
+            results = [_fit_one(algorithm, params) for params in grid]
+        finally:
+            _init_sweep(None, None, None)
+    else:
+        with ProcessPoolExecutor(n_workers, initializer=_init_sweep, initargs=(data, distances, alpha)) as executor:
+            results = list(executor.map(_fit_one, itertools.repeat(algorithm), grid))
+
+    results.sort(key=lambda result: (result.score is None, result.score if result.score is not None else 0.0))
+    best = results[0] if results and results[0].score is not None else None
+    ch = ClusterHolder(data, best.labels, alpha=alpha, distances=distances) if best is not None else None
+    return results, ch
+
+
+## Convert "key=values" strings to parameter ranges
+#  Values are a comma separated list ("k-means++,random"), an inclusive range "start:stop" or "start:stop:step"
+#  (step is required for float parameters), or a single value.
+# @param items List of "key=values" strings
+# @param params_class Parameters dataclass
+# @return Dictionary of parameter name --> list of values
+def parse_ranges(items, params_class):
+    types = {f.name: f.type for f in fields(params_class)}
+    ranges = dict()
+    for key, values in split_items(items):
+        value_type = types.get(key)
+        if "," in values:
+            ranges[key] = [parse_value(value, value_type) for value in values.split(",")]
+        elif ":" in values and value_type in (int, float):
+            parts = [value_type(part) for part in values.split(":")]
+            start, stop = parts[0], parts[1]
+            step = parts[2] if len(parts) > 2 else 1
+            if value_type is float and len(parts) < 3:
+                raise ValueError(f"Range of float parameter '{key}' needs a step, e.g. {values}:0.1")
+            count = int(round((stop - start) / step)) + 1
+            ranges[key] = [value_type(start + i * step) for i in range(count)]
+        else:
+            ranges[key] = [parse_value(values, value_type)]
+    return ranges
+
+
+## Write ranked results as CSV, one row per parameter combination
+def save_results(path, results):
+    names = [f.name for f in fields(results[0].params)] if results else []
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["rank", "score", "clusters_found", "noise_nodes", "fit_time"] + names + ["error"])
+        for rank, result in enumerate(results, 1):
+            params = asdict(result.params)
+            writer.writerow([rank, result.score, result.n_clusters, result.n_noise, f"{result.fit_time:.4f}"] + [params[name] for name in names] + [result.error or ""])
+
+
+## Command line entry point
+# @param argv Command line arguments, sys.argv when None
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep parameters of a clustering algorithm and rank them by the hub objective function")
+    parser.add_argument("data", help="data file (*.txt, *.csv, *.npy, *.bin, *.dat)")
+    parser.add_argument("-a", "--algorithm", choices=CLUSTERINGS, default="kmeans", help="clustering algorithm")
+    parser.add_argument("-r", "--ranges", nargs="+", required=True, metavar="KEY=VALUES", help="swept parameters, e.g. n_clusters=2:10 eps=0.1:1.0:0.1 init=k-means++,random")
+    parser.add_argument("-p", "--params", nargs="*", default=[], metavar="KEY=VALUE", help="fixed parameters of the clustering algorithm")
+    parser.add_argument("--workers", type=int, help="number of worker processes")
+    parser.add_argument("--alpha", type=float, default=0.75, help="discount factor of the hub-to-hub distance")
+    parser.add_argument("-o", "--output", help="CSV file of the ranked results")
+    args = parser.parse_args(argv)
+
+    params_class = CLUSTERINGS[args.algorithm][1]
+    try:
+        base = params_class(**parse_params(args.params, params_class))
+        ranges = parse_ranges(args.ranges, params_class)
+    except (ValueError, TypeError) as e:
+        parser.error(str(e))
+    results, _ = sweep(load_data(args.data), args.algorithm, ranges, base, args.workers, alpha=args.alpha)
+
+    for rank, result in enumerate(results, 1):
+        swept = ", ".join(f"{name}={getattr(result.params, name)}" for name in ranges)
+        outcome = f"score {result.score:.3f}, {result.n_clusters} clusters, {result.n_noise} noise nodes" if result.error is None else result.error
+        print(f"{rank:4d}. {swept}: {outcome} ({result.fit_time:.3f} s)")
+    if args.output:
+        save_results(args.output, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+## @package conftest
+#  Modules of the program are flat in the repository root, tests import them from there
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
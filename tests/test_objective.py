@@ -0,0 +1,116 @@
+## @package test_objective
+#  Incremental and exact evaluations against full recomputation and brute force on random instances
+#  DeltaObjective is compared with hub_objective recomputed from scratch, best_hub_relocation and
+#  best_node_reallocation with an exhaustive search over all moves, and one_center with all-pairs radii.
+#  Every check runs on straight-line distances and on distance matrices (Euclidean and Manhattan).
+
+import numpy as np
+import pytest
+from scipy.spatial.distance import cdist
+from distances import EuclideanDistances, DistanceMatrix
+from heuristics import HillClimbing
+from onecenter import one_center
+from utils import ClusterHolder
+
+DISTANCES = ["euclidean", "euclidean_matrix", "manhattan_matrix"]
+SEEDS = range(10)
+
+
+## Distance oracle of a data cloud
+# @param data Data cloud
+# @param kind One of DISTANCES
+def make_distances(data, kind):
+    if kind == "euclidean":
+        return EuclideanDistances(data)
+    if kind == "euclidean_matrix":
+        return DistanceMatrix(cdist(data, data))
+    return DistanceMatrix(cdist(data, data, metric="cityblock"))
+
+
+## Random data cloud with a random solution, every cluster has at least one node
+#  Even seeds allocate nodes to random clusters, so every cluster spans the data cloud. Odd seeds allocate nodes to
+#  the nearest of random centers, the first one attracting from 5 times farther, so one large cluster surrounds small
+#  ones and twice its radius competes with the pair terms.
+# @return HillClimbing heuristic on the solution, its moves are the ones under test
+def make_heuristic(seed, kind, n_nodes=40, n_clusters=5):
+    rng = np.random.default_rng(seed)
+    data = rng.uniform(0, 1000, size=(n_nodes, 2))
+    if seed % 2 == 0:
+        labels, alpha = rng.permutation(np.arange(n_nodes) % n_clusters), 0.75
+    else:
+        scale = np.r_[0.2, np.ones(n_clusters - 1)]
+        labels, alpha = np.argmin(cdist(data, data[:n_clusters]) * scale, axis=1), 0.3
+    ch = ClusterHolder(data, labels, alpha=alpha, distances=make_distances(data, kind))
+    return HillClimbing(ch, n_iterations=1, seed=seed)
+
+
+## Objective of the current solution recomputed from scratch
+def full_score(ch):
+    return float(ClusterHolder(ch.data, ch.labels, alpha=ch.alpha, distances=ch.distances, hubs=ch.get_hubs()).calculate_objective_function())
+
+
+@pytest.mark.parametrize("kind", DISTANCES)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_delta_objective_matches_full_recomputation(seed, kind):
+    h = make_heuristic(seed, kind)
+    assert h.objective.score() == pytest.approx(full_score(h.ch))
+    for step in range(300):
+        moves = [h.relocate_hub, h.reallocate_node, h.swap_nodes, h.best_hub_relocation, h.best_node_reallocation][step % 5]()
+        assert h.objective.score() == pytest.approx(full_score(h.ch))
+        if h.rng.random() < 0.5:
+            h.undo(moves)
+            assert h.objective.score() == pytest.approx(full_score(h.ch))
+
+
+@pytest.mark.parametrize("kind", DISTANCES)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_best_hub_relocation_is_exhaustive(seed, kind):
+    h = make_heuristic(seed, kind)
+    for cluster in h.ch.clusters:
+        hub = cluster.central_node_index
+        scores = list()
+        for node in cluster.nodes:
+            cluster.central_node_index = int(node)
+            scores.append(full_score(h.ch))
+        cluster.central_node_index = hub
+        h.best_hub_relocation(cluster)
+        assert full_score(h.ch) == pytest.approx(min(scores))
+        assert h.objective.score() == pytest.approx(min(scores))
+
+
+@pytest.mark.parametrize("kind", DISTANCES)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_best_node_reallocation_is_exhaustive(seed, kind):
+    h = make_heuristic(seed, kind)
+    hubs = set(h.ch.get_hubs().tolist())
+    for node in [node for node in range(len(h.ch.data)) if node not in hubs][:10]:
+        source = int(h.ch.labels[node])
+        scores = list()
+        for target in range(h.n_clusters):
+            if target != source:
+                h.ch.move_node(node, target)
+                scores.append(full_score(h.ch))
+                h.ch.move_node(node, source)
+        h.best_node_reallocation(node)
+        assert full_score(h.ch) == pytest.approx(min(scores))
+        assert h.objective.score() == pytest.approx(min(scores))
+
+
+@pytest.mark.parametrize("kind", DISTANCES)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_one_center_matches_brute_force(seed, kind):
+    rng = np.random.default_rng(seed)
+    data = rng.uniform(0, 1000, size=(60, 2))
+    data[:10, 1] = data[:10, 0]  # collinear nodes, the convex hull can not be computed for them alone
+    data[10:15] = data[15]  # identical nodes
+    distances = make_distances(data, kind)
+    for nodes in [np.arange(10), np.arange(10, 20), np.sort(rng.choice(60, size=25, replace=False)), np.arange(60), np.array([7])]:
+        radii = np.asarray(distances.pairwise(nodes, nodes)).max(axis=1)
+        center, radius = one_center(nodes, distances)
+        assert radius == pytest.approx(radii.min())
+        assert np.asarray(distances.between(center, nodes)).max() == pytest.approx(radii.min())
+
+        weights = rng.uniform(0, 500, size=len(nodes))
+        cost = lambda candidates, radii: np.maximum(radii + weights[candidates], 2 * radii)
+        _, value = one_center(nodes, distances, cost)
+        assert value == pytest.approx(cost(np.arange(len(nodes)), radii).min())
@@ -344,6 +344,9 @@ class Ui_MainWindow(object):
         self.actionExport_As_Final_Solution = QtWidgets.QAction(MainWindow)
         self.actionExport_As_Final_Solution.setEnabled(False)
         self.actionExport_As_Final_Solution.setObjectName("actionExport_As_Final_Solution")
+        self.actionCancel = QtWidgets.QAction(MainWindow)
+        self.actionCancel.setEnabled(False)
+        self.actionCancel.setObjectName("actionCancel")
         self.menuExport_As.addAction(self.actionExport_As_Initial_Solution)
         self.menuExport_As.addAction(self.actionExport_As_Final_Solution)
         self.menuFile.addAction(self.actionOpen_Data)
@@ -372,6 +375,8 @@ class Ui_MainWindow(object):
         self.menuClustering.addAction(self.actionDBSCAN)
         self.menuHeuristics.addAction(self.actionHill_Climbing)
         self.menuHeuristics.addAction(self.actionSimulated_Anneling)
+        self.menuHeuristics.addSeparator()
+        self.menuHeuristics.addAction(self.actionCancel)
         self.menubar.addAction(self.menuFile.menuAction())
         self.menubar.addAction(self.menuEdit.menuAction())
         self.menubar.addAction(self.menuClustering.menuAction())
@@ -480,6 +485,9 @@ class Ui_MainWindow(object):
         self.actionExport_As_Initial_Solution.setStatusTip(_translate("MainWindow", "Save initial solution with extension .jpg"))
         self.actionExport_As_Final_Solution.setText(_translate("MainWindow", "Final Solution"))
         self.actionExport_As_Final_Solution.setStatusTip(_translate("MainWindow", "Save final solution with extension .jpg"))
+        self.actionCancel.setText(_translate("MainWindow", "Cancel"))
+        self.actionCancel.setStatusTip(_translate("MainWindow", "Cancel running clustering or heuristics algorithm"))
+        self.actionCancel.setShortcut(_translate("MainWindow", "Esc"))
 
 
 if __name__ == "__main__":
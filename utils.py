@@ -1,139 +1,256 @@
 from itertools import combinations
+from copy import deepcopy
 import numpy as np
+from distances import EuclideanDistances
+from onecenter import one_center
+
+
+## Calculate the objective function from cluster radii and hub-to-hub distances
+#  max(max over i<j of r_i + alpha * d_ij + r_j, 2 * max r), evaluated as one NumPy expression
+# @param radii Distance of farthest point to the hub, for every cluster
+# @param hub_distances Distance matrix between hubs (p x p)
+# @param alpha Discount factor of the hub-to-hub distance
+# @return Objective function score and (i, j) pair giving it, pair is None when 2 * max radius dominates
+def hub_objective(radii, hub_distances, alpha):
+    score = 2 * radii.max()
+    if len(radii) < 2:
+        return score, None
+    rows, cols = np.triu_indices(len(radii), k=1)
+    pair_terms = radii[rows] + alpha * hub_distances[rows, cols] + radii[cols]
+    best = np.argmax(pair_terms)
+    if pair_terms[best] > score:
+        return pair_terms[best], (int(rows[best]), int(cols[best]))
+    return score, None
 
 ## Class to hold a cluster info
+#  Cluster nodes are stored as indices of the data cloud, coordinates are derived from data on demand
 class Cluster:
     ## Constructor
-    def __init__(self, index, points, center_point=None):
-        self.central_node = None
+    # @param index Index of the cluster
+    # @param data Data cloud (all points)
+    # @param nodes Indices of the cluster nodes in the data cloud
+    # @param center_point Center point of the cluster, calculated when not given
+    # @param distances Distance oracle of the data cloud, Euclidean distances are computed when not given
+    # @param central_node_index Data index of the hub, the node closest to the center point is chosen when not given
+    def __init__(self, index, data, nodes, center_point=None, distances=None, central_node_index=None):
         self.central_node_index = None
         self.distance_of_farthest_point = None
         self.cluster_index = index
-        self.points = points
+        self.data = data
+        self.distances = distances if distances is not None else EuclideanDistances(data)
+        self.nodes = np.asarray(nodes, dtype=int)
         if center_point is not None:
             self.center_point = center_point
         else:
             self.find_center_point()
 
-        self.find_closest_point()
+        if central_node_index is not None:
+            self.central_node_index = int(central_node_index)
+        else:
+            self.find_closest_point()
         self.find_distance_of_farthest_point()
 
+    ## Coordinates of the cluster nodes
+    @property
+    def points(self):
+        return self.data[self.nodes]
+
+    ## Coordinates of the central node (hub)
+    @property
+    def central_node(self):
+        return self.data[self.central_node_index]
+
     ## Check if given node is central node
-    def is_central_node(self, point):
-        if point == self.central_node:
-            return True
-        else:
-            return False
+    # @param node Index of the node in the data cloud
+    def is_central_node(self, node):
+        return node == self.central_node_index
 
     ## Find center point of cluster
     def find_center_point(self):
-        center_point = np.sum(self.points, axis=0) / len(self.points)
+        center_point = np.sum(self.points, axis=0) / len(self.nodes)
         self.center_point = center_point
 
     ## Find closest point to the center point, which is central_node
+    #  Center point is not a node, so this is the only distance computed from coordinates
     def find_closest_point(self): # Find central node (closest point to the center point)
         diff = (self.center_point - self.points)
         dist = np.sqrt(np.sum(diff ** 2, axis=-1))
-        self.central_node_index = np.argmin(dist)
-        self.central_node = self.points[self.central_node_index]
+        self.central_node_index = int(self.nodes[np.argmin(dist)])
+
+    ## Set the central node to the discrete 1-center of the cluster, the node closest to its farthest node
+    #  Minimizes the radius of the cluster, see onecenter.py
+    def find_one_center(self):
+        self.central_node_index, self.distance_of_farthest_point = one_center(self.nodes, self.distances)
 
     ## Find distance of farthest point in the cluster to the cluster center node
     def find_distance_of_farthest_point(self):
-        diff = (self.central_node - self.points)
-        dist = max(np.sqrt(np.sum(diff ** 2, axis=-1)))
+        dist = np.max(self.distances.between(self.central_node_index, self.nodes))
         self.distance_of_farthest_point = dist
 
     def __str__(self):
-        return f"Cluster {self.cluster_index} =====> {self.points}, Center node = {self.central_node}"
+        return f"Cluster {self.cluster_index} =====> {self.nodes.tolist()}, Center node = {self.central_node_index}"
 
 
 ## A class for holding and manipulating all clusters
+#  labels[i] is the index of the cluster that node i belongs to. Noise nodes (-1, e.g. from DBSCAN) are allocated to
+#  the cluster of their nearest hub, so every solution is scored with every node allocated.
 class ClusterHolder:
     ## Constructor
-    def __init__(self, data, labels, center_points=None):
+    # @param data Data cloud
+    # @param labels Cluster index of every node
+    # @param center_points Center points of clusters, calculated when not given
+    # @param alpha Discount factor of the hub-to-hub distance in the objective function
+    # @param distances Distance oracle of the data cloud (see distances.py), Euclidean distances are computed when not given
+    # @param hubs Data indices of the hubs of clusters, nodes closest to the center points are chosen when not given
+    def __init__(self, data, labels, center_points=None, alpha=0.75, distances=None, hubs=None):
         self.info = ""
+        self.alpha = alpha
         self.clusters = list()
         self.data = data
-        self.labels = labels
-        self.n_clusters = len(np.unique(labels)) - (1 if -1 in labels else 0) # DBSCAN returns -1 for noisy points, for DBSCAN we subtract 1 when noisy points are there
+        self.distances = distances if distances is not None else EuclideanDistances(data)
+        self.labels = np.array(labels, dtype=int)
+        # cluster indices are renumbered to 0..n_clusters-1 (labels may have gaps, e.g. spectral), -1 stays noise
+        clustered = self.labels != -1
+        cluster_labels, self.labels[clustered] = np.unique(self.labels[clustered], return_inverse=True)
+        self.n_clusters = len(cluster_labels)
+        if self.n_clusters == 0:
+            raise ValueError("Clustering found no clusters, every node is noise")
         if center_points is not None:
             self.center_points = center_points
         else:
             self.center_points = [None] * self.n_clusters
 
-        self.split_into_clusters()
-
-        self.objective_function = list()
-        self.calculate_objective_function()
+        self.split_into_clusters(hubs)
+        self.n_noise = self.allocate_noise(hubs)
 
     ## Update initial solution info
     #  Call this method when cluster points move or changes
+    #  Info is only generated here, when it is going to be viewed, never while evaluating the objective function
     def rewrite_info(self):
         self.info = ""
         self.print_splitted_clusters()
         self.print_cluster_center_nodes()
-        self.calculate_objective_function()
+        self.print_objective_function()
 
     ## Split datacloud into clusters
-    def split_into_clusters(self):
-        for i in range(self.n_clusters):
-            self.clusters.append(Cluster(index=i, points=self.data[np.where(self.labels == i)], center_point=self.center_points[i]))
-        self.print_splitted_clusters()
-        self.print_cluster_center_nodes()
+    # @param hubs Data indices of the hubs of clusters, optional
+    def split_into_clusters(self, hubs=None):
+        if hubs is None:
+            hubs = [None] * self.n_clusters
+        for i, nodes in enumerate(self.group_nodes()):
+            self.clusters.append(Cluster(index=i, data=self.data, nodes=nodes, center_point=self.center_points[i], distances=self.distances, central_node_index=hubs[i]))
+
+    ## Allocate noise nodes (label -1) to the cluster of their nearest hub
+    #  Every node must be allocated to a hub, otherwise the objective ignores the noise nodes and rewards leaving nodes out.
+    #  Hubs are the ones chosen for the clustered nodes, clusters are split again with the noise nodes allocated.
+    # @param hubs Data indices of the hubs of clusters, optional
+    # @return Number of noise nodes
+    def allocate_noise(self, hubs=None):
+        noise = np.flatnonzero(self.labels == -1)
+        if len(noise) == 0:
+            return 0
+        self.labels[noise] = np.argmin(np.asarray(self.distances.pairwise(noise, self.get_hubs())), axis=1)
+        self.clusters = list()
+        self.split_into_clusters(hubs)
+        return len(noise)
+
+    ## Group node indices by their labels
+    #  Nodes are grouped with a single sort instead of scanning the labels once per cluster, noise nodes (-1) are left out
+    #  @return List of node index arrays, ordered by cluster index
+    def group_nodes(self):
+        order = np.argsort(self.labels, kind="stable")
+        bounds = np.searchsorted(self.labels[order], np.arange(self.n_clusters + 1))
+        return [order[bounds[i]:bounds[i + 1]] for i in range(self.n_clusters)]
 
     ## Generate splitted cluster info
     def print_splitted_clusters(self):
         self.info += f"\nThere are {len(self.clusters)} clusters\n"
         for i, cluster in enumerate(self.clusters):
             strng = "" + "Cluster " + str(i) + " ======>"
-            temp = []
-            for point in cluster.points:
-                temp.append(self.get_data_index_by_point(point))
-            strng += " " + str(temp)
+            strng += " " + str(cluster.nodes.tolist())
             self.info += strng + '\n'
 
     ## Generate clusters' center node info
     def print_cluster_center_nodes(self):
         self.info += "Cluster center nodes ======> "
-        temp = []
-        for cluster in self.clusters:
-            temp.append(self.get_data_index_by_point(cluster.central_node))
-        self.info += str(temp) + '\n'
+        self.info += str(self.get_hubs().tolist()) + '\n'
 
-    ## Calculate the objective function
-    def calculate_objective_function(self):
+    ## Generate objective function info
+    #  Farthest hub distances, all possible pairs and the objective of every pair
+    def print_objective_function(self):
         self.info += "\n------Farthest hub distances------\n"
-        self.objective_function = list()
         hub_dist = dict()
         for cluster in self.clusters:
             cluster.find_center_point()
             cluster.find_distance_of_farthest_point()
-            hub_dist.setdefault(self.get_data_index_by_point(cluster.central_node), cluster.distance_of_farthest_point)
+            hub_dist.setdefault(cluster.central_node_index, cluster.distance_of_farthest_point)
         self.info += str(hub_dist) + '\n'
 
         pair_list = list(combinations(range(self.n_clusters),2))
         self.info += "\nAll possible pairs : \n"
-        possible_pairs = list()
-        for pair in pair_list:
-            possible_pairs.append([self.get_data_index_by_point(self.get_cluster_by_index(pair[0]).central_node), self.get_data_index_by_point(self.get_cluster_by_index(pair[1]).central_node)])
         self.info += str(pair_list) + '\n'
 
-        for pair in pair_list:
-            self.objective_function.append(self.get_cluster_by_index(pair[0]).distance_of_farthest_point + 0.75 * self.find_distance_between_clusters(pair[0], pair[1]) + self.get_cluster_by_index(pair[0]).distance_of_farthest_point)
-        self.objective_function.append(2*max(self.get_cluster_distance_of_farthest_points()))
+        radii = self.get_radii()
+        rows, cols = np.triu_indices(self.n_clusters, k=1)
+        objective_function = (radii[rows] + self.alpha * self.get_hub_distances()[rows, cols] + radii[cols]).tolist()
+        objective_function.append(float(2*radii.max()))
 
         self.info += "\n------Pair objectives------\n"
-        self.info += str(self.objective_function)
-        self.info += f"\nObjective function ======> {max(self.objective_function)}\n"
+        self.info += str(objective_function)
+        self.info += f"\nObjective function ======> {max(objective_function)}\n"
+
+    ## Calculate the objective function
+    #  Pure numeric, no info is generated
+    # @param return_pair If True, the pair of cluster indices giving the objective is returned too
+    # @return Objective function score, and (i, j) pair or None when 2 * max radius dominates if return_pair is True
+    def calculate_objective_function(self, return_pair=False):
+        for cluster in self.clusters:
+            cluster.find_distance_of_farthest_point()
+
+        score, best_pair = hub_objective(self.get_radii(), self.get_hub_distances(), self.alpha)
+        if return_pair:
+            return score, best_pair
+        return score
 
-        return max(self.objective_function)
+    ## Copy of the solution, data cloud and distances are shared instead of copied
+    #  @return New ClusterHolder object
+    def copy(self):
+        return deepcopy(self, {id(self.data): self.data})
 
-    ## Returns index of the point in data cloud
-    def get_data_index_by_point(self, point):
-        for indx, dt in enumerate(self.data):
-            if np.array_equal(dt, point):
-                return indx
-        return -1
+    ## Return a snapshot of the solution, labels of the nodes and hubs of the clusters
+    def get_solution(self):
+        return self.labels.copy(), self.get_hubs()
+
+    ## Restore a solution snapshot taken by get_solution
+    # @param labels Cluster index of every node
+    # @param hubs Data index of the hub of every cluster
+    def set_solution(self, labels, hubs):
+        self.labels = labels.copy()
+        for cluster, nodes, hub in zip(self.clusters, self.group_nodes(), hubs):
+            cluster.nodes = nodes
+            cluster.central_node_index = int(hub)
+            cluster.find_center_point()
+            cluster.find_distance_of_farthest_point()
+
+    ## Returns data indices of the central nodes (hubs), ordered by cluster index
+    def get_hubs(self):
+        return np.array([cluster.central_node_index for cluster in self.clusters], dtype=int)
+
+    ## Set the hub of every cluster to its discrete 1-center, which minimizes the radius of the cluster
+    #  Post-clustering step, hubs closest to the center points do not minimize the radii the objective penalizes
+    def optimize_hubs(self):
+        for cluster in self.clusters:
+            cluster.find_one_center()
+
+    ## Move a node from its current cluster to the cluster with given index
+    # @param node Index of the node in the data cloud
+    # @param target Index of the destination cluster
+    def move_node(self, node, target):
+        source = self.clusters[self.labels[node]]
+        source.nodes = source.nodes[source.nodes != node]
+        destination = self.clusters[target]
+        destination.nodes = np.append(destination.nodes, node)
+        self.labels[node] = target
 
     ## Calculate and return distances of farthest point for each cluster
     def get_cluster_distance_of_farthest_points(self):
@@ -142,17 +259,108 @@ class ClusterHolder:
             distance_of_farthest_points.append(cluster.distance_of_farthest_point)
         return distance_of_farthest_points
 
+    ## Returns distances of farthest point of every cluster as an array
+    def get_radii(self):
+        return np.array(self.get_cluster_distance_of_farthest_points(), dtype=float)
+
+    ## Calculates and returns distance matrix between central nodes of all clusters
+    def get_hub_distances(self):
+        hubs = self.get_hubs()
+        return np.asarray(self.distances.pairwise(hubs, hubs), dtype=float)
+
     ## Calculates and returns distance between two cluster
     # @param a ClusterA
     # @param b ClusterB
     def find_distance_between_clusters(self, a, b): # Finds the distance between central nodes of cluster_a and cluster_b
-        diff = self.get_cluster_by_index(a).central_node - self.get_cluster_by_index(b).central_node
-        dist = np.sqrt(np.sum(diff ** 2, axis=-1))
-        return dist
+        return self.distances.between(self.get_cluster_by_index(a).central_node_index, self.get_cluster_by_index(b).central_node_index)
 
     ## Returns cluster by given index
+    #  Clusters are stored in the order of their indices
     def get_cluster_by_index(self, index):
-        for cluster in self.clusters:
-            if cluster.cluster_index == index:
-                return cluster
-        return None
\ No newline at end of file
+        if 0 <= index < len(self.clusters):
+            return self.clusters[index]
+        return None
+
+
+## Incremental (delta) evaluator of the objective function
+#  Keeps the radius (distance of farthest point to the hub) of every cluster, the hub-to-hub distances and the pair terms
+#  r_i + alpha * d_ij + r_j cached, so after a move only the clusters touched by the move are recomputed.
+#  The objective is the same as hub_objective, discount factor is taken from the ClusterHolder
+class DeltaObjective:
+    ## Constructor
+    # @param ch ClusterHolder to evaluate
+    def __init__(self, ch):
+        self.ch = ch
+        self.alpha = ch.alpha
+        self.hubs = None
+        self.radii = None
+        self.hub_distances = None
+        self.pair_terms = None
+        self.row_max = None
+        self.rebuild()
+
+    ## Recompute all cached values from scratch
+    def rebuild(self):
+        n_clusters = len(self.ch.clusters)
+        self.hubs = self.ch.get_hubs()
+        self.radii = np.array([self.find_radius(i) for i in range(n_clusters)], dtype=float)
+        self.hub_distances = self.ch.get_hub_distances()
+        self.pair_terms = self.radii[:, np.newaxis] + self.alpha * self.hub_distances + self.radii[np.newaxis, :]
+        np.fill_diagonal(self.pair_terms, -np.inf)
+        self.row_max = self.pair_terms.max(axis=1) if n_clusters > 1 else np.full(n_clusters, -np.inf)
+
+    ## Return current objective function score
+    def score(self):
+        return max(self.row_max.max(initial=-np.inf), 2 * self.radii.max())
+
+    ## Distance of farthest node of the cluster to its hub, also stored in the cluster
+    # @param index Index of the cluster
+    def find_radius(self, index):
+        cluster = self.ch.clusters[index]
+        cluster.find_distance_of_farthest_point()
+        return cluster.distance_of_farthest_point
+
+    ## Distance between a node and the hub of given cluster
+    def distance_to_hub(self, node, index):
+        return self.ch.distances.between(self.hubs[index], node)
+
+    ## Hub of the cluster is changed, update its radius and hub distances
+    # @param index Index of the cluster
+    def hub_changed(self, index):
+        self.hubs[index] = self.ch.clusters[index].central_node_index
+        distances = self.ch.distances.between(self.hubs[index], self.hubs)
+        self.hub_distances[index, :] = distances
+        self.hub_distances[:, index] = distances
+        self.radii[index] = self.find_radius(index)
+        self.refresh_pair_terms(index)
+
+    ## Node is moved from source cluster to target cluster, update radii of these clusters
+    #  Radius of the source cluster is recomputed only if the moved node was its farthest node
+    # @param node Index of the moved node in the data cloud
+    # @param source Index of the cluster that node is taken from
+    # @param target Index of the cluster that node is added to
+    def node_moved(self, node, source, target):
+        if self.distance_to_hub(node, source) >= self.radii[source]:
+            self.radii[source] = self.find_radius(source)
+            self.refresh_pair_terms(source)
+        distance = self.distance_to_hub(node, target)
+        if distance > self.radii[target]:
+            self.radii[target] = distance
+            self.ch.clusters[target].distance_of_farthest_point = distance
+            self.refresh_pair_terms(target)
+
+    ## Recompute the pair terms involving given cluster and the cached row maxima
+    def refresh_pair_terms(self, index):
+        terms = self.radii[index] + self.alpha * self.hub_distances[index] + self.radii
+        terms[index] = -np.inf
+        old_terms = self.pair_terms[:, index].copy()
+        self.pair_terms[index, :] = terms
+        self.pair_terms[:, index] = terms
+        self.row_max[index] = terms.max()
+        increased = terms >= self.row_max
+        self.row_max[increased] = terms[increased]
+        # rows whose maximum was the old term of this cluster and decreased must be rescanned
+        stale = (old_terms >= self.row_max) & (terms < old_terms)
+        stale[index] = False
+        for row in np.flatnonzero(stale):
+            self.row_max[row] = self.pair_terms[row].max()
@@ -0,0 +1,88 @@
+## @package warmstart
+#  Warm start of k-means fits from the labels of the previous fit on the same data cloud
+#  Initial centers are the means of the previous clusters, split or merged to the new number of clusters,
+#  so a refit after n_clusters or max_iter changes converges in a few iterations instead of starting from k-means++.
+
+from dataclasses import fields
+import numpy as np
+from cache import data_fingerprint, LRUCache
+
+## Parameters and labels of recent fits, by data fingerprint and clustering algorithm
+previous_fits = LRUCache(8)
+
+
+## Labels of the previous fit that can warm start a fit with the given parameters
+#  Previous fit qualifies if its parameters differ from params only in the free parameters.
+# @param data Data cloud
+# @param algorithm Name of the clustering algorithm
+# @param params Parameters dataclass of the new fit
+# @param free Names of the parameters that may differ from the previous fit
+# @return Cluster index of every node, None if there is no previous fit to start from
+def previous_labels(data, algorithm, params, free=("n_clusters", "max_iter")):
+    previous = previous_fits.get((data_fingerprint(data), algorithm))
+    if previous is None:
+        return None
+    previous_params, labels = previous
+    if any(getattr(previous_params, f.name) != getattr(params, f.name) for f in fields(params) if f.name not in free):
+        return None
+    return labels
+
+
+## Remember the labels of a fit for the next warm start
+# @param data Data cloud
+# @param algorithm Name of the clustering algorithm
+# @param params Parameters dataclass of the fit
+# @param labels Cluster index of every node
+def remember_labels(data, algorithm, params, labels):
+    previous_fits.put((data_fingerprint(data), algorithm), (params, np.asarray(labels)))
+
+
+## Initial centers of a k-means fit from the labels of a previous fit
+#  Centers are the means of the previous clusters in the given space. While there are too few centers, the cluster
+#  with the largest sum of squared errors is split in two along its principal axis. While there are too many,
+#  the two clusters whose merge increases the sum of squared errors least (Ward criterion) are merged.
+# @param points n x d points the k-means fit runs on, e.g. the data cloud or a spectral embedding
+# @param labels Cluster index of every point from the previous fit
+# @param n_clusters Number of centers
+# @return n_clusters x d centers
+def initial_centers(points, labels, n_clusters):
+    points = np.asarray(points, dtype=np.float64)
+    _, labels = np.unique(labels, return_inverse=True)
+    sizes = np.bincount(labels).astype(np.float64)
+    centers = np.stack([np.bincount(labels, weights=points[:, j]) for j in range(points.shape[1])], axis=1) / sizes[:, None]
+    members = [np.flatnonzero(labels == i) for i in range(len(sizes))]
+    errors = [float(((points[index] - center) ** 2).sum()) for index, center in zip(members, centers)]
+    centers, sizes = list(centers), list(sizes)
+
+    while len(centers) < n_clusters:
+        i = int(np.argmax(errors))
+        if len(members[i]) < 2:
+            break
+        cluster = points[members[i]] - centers[i]
+        side = cluster @ np.linalg.svd(cluster, full_matrices=False)[2][0] > 0
+        if side.all() or not side.any():  # identical points
+            break
+        halves = [members[i][side], members[i][~side]]
+        del centers[i], sizes[i], members[i], errors[i]
+        for index in halves:
+            center = points[index].mean(axis=0)
+            centers.append(center)
+            sizes.append(float(len(index)))
+            members.append(index)
+            errors.append(float(((points[index] - center) ** 2).sum()))
+
+    while len(centers) > n_clusters:
+        stacked, weights = np.array(centers), np.array(sizes)
+        cost = weights[:, None] * weights[None, :] / (weights[:, None] + weights[None, :]) * ((stacked[:, None, :] - stacked[None, :, :]) ** 2).sum(axis=2)
+        np.fill_diagonal(cost, np.inf)
+        i, j = sorted(np.unravel_index(np.argmin(cost), cost.shape))
+        centers[i] = (sizes[i] * centers[i] + sizes[j] * centers[j]) / (sizes[i] + sizes[j])
+        sizes[i] += sizes[j]
+        del centers[j], sizes[j]
+
+    if len(centers) < n_clusters:  # too few distinct points to split, fill with points far from the centers
+        stacked = np.array(centers)
+        distance = ((points[:, None, :] - stacked[None, :, :]) ** 2).sum(axis=2).min(axis=1)
+        for index in np.argsort(distance)[::-1][:n_clusters - len(centers)]:
+            centers.append(points[index])
+    return np.array(centers)
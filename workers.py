@@ -0,0 +1,58 @@
+## @package workers
+#  Runs clustering and heuristics algorithms on QThreadPool, off the GUI thread
+#  Results, progress and errors are sent back to the GUI thread with Qt signals.
+
+import traceback
+from PyQt5 import QtCore
+
+
+## Signals of a Worker
+#  QRunnable is not a QObject, so it can not emit signals by itself
+class WorkerSignals(QtCore.QObject):
+    progress = QtCore.pyqtSignal(int, float)  # iteration, best score so far
+    finished = QtCore.pyqtSignal(object)  # return value of the function
+    error = QtCore.pyqtSignal(str)  # traceback of the exception
+
+
+## Runs a function on a thread of QThreadPool
+#  Connect to the signals before starting the worker
+class Worker(QtCore.QRunnable):
+    ## Constructor
+    # @param function Function to run on the worker thread
+    # @param args Positional arguments of the function
+    # @param kwargs Keyword arguments of the function
+    def __init__(self, function, *args, **kwargs):
+        super().__init__()
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+        self.cancelled = False
+        self.cancel_callback = None  # called on cancel, e.g. to ask the running algorithm to stop
+
+    ## Run the function, called by QThreadPool on the worker thread
+    @QtCore.pyqtSlot()
+    def run(self):
+        try:
+            result = self.function(*self.args, **self.kwargs)
+        except Exception:
+            self.signals.error.emit(traceback.format_exc())
+        else:
+            self.signals.finished.emit(result)
+
+    ## Report progress, can be called from the function on the worker thread
+    # @param iteration Current iteration
+    # @param score Best score so far
+    def report_progress(self, iteration, score):
+        self.signals.progress.emit(iteration, score)
+
+    ## Mark the worker as cancelled and call cancel_callback
+    #  Function keeps running until it checks for cancellation itself
+    def cancel(self):
+        self.cancelled = True
+        if self.cancel_callback is not None:
+            self.cancel_callback()
+
+    ## Start the worker on the global thread pool
+    def start(self):
+        QtCore.QThreadPool.globalInstance().start(self)